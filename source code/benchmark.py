@@ -0,0 +1,302 @@
+"""This file times the functions that the computer players spend most of
+their time in, on fixed positions, so that a change that makes them slower
+is noticed before the gui starts to lag.
+
+The results are saved as json along with the machine and python version
+they were measured on. When a baseline file from an earlier run is given,
+every function that got slower than the baseline by more than the threshold
+is reported as a regression and the program exits with status 1. Timings are
+only comparable between runs on the same machine.
+
+The positions are the test positions of perft.py. The smart player is timed
+with chooseComputerMove() at a fixed depth, which is the search that
+computeComputerMove() does without drawing the move on the gui. The opening
+book and the tablebase are turned off so that the search is what is timed.
+
+Example:
+    python benchmark.py --output before.json
+    python benchmark.py --baseline before.json"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cfg
+import checkerLogic
+import checkerSearch
+import gameState
+import perft
+import positionCode
+
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = .2
+
+#the depth that the smart player searches to when it is timed
+SEARCH_DEPTH = 5
+
+
+def loadPositions():
+    """returns the test positions of perft.py as a list of
+(name, ModelBoard, player to move)"""
+
+    positions = []
+    for name, diagram, player, references in perft.POSITIONS:
+        if diagram == None:
+            board = gameState.startingBoard()
+        else:
+            board = perft.boardFromDiagram(diagram)
+        positions.append((name, board, player))
+
+    return positions
+
+def piecesOn(board):
+    """every (row, col, player, pieceType) on the board"""
+    return [
+        (row, col, board[row][col].player, board[row][col].pieceType)
+        for player in (cfg.PLAYER_1, cfg.PLAYER_2)
+        for row, col in checkerLogic.piecesOf(player, board)
+        ]
+
+
+def makeBenchmarks(positions):
+    """returns a dictionary of benchmark name to a function that runs the
+benchmark once over every position"""
+
+    pieces = [(board, piecesOn(board)) for name, board, player in positions]
+    moves = [
+        (board, player, checkerLogic.possibleMoves(player, board))
+        for name, board, player in positions
+        ]
+    states = [
+        gameState.GameState(checkerLogic.produceModelBoard(board), player)
+        for name, board, player in positions
+        ]
+    codes = [positionCode.encode(state) for state in states]
+
+    def whereCanIKill():
+        for board, boardPieces in pieces:
+            for row, col, player, pieceType in boardPieces:
+                checkerLogic.whereCanIKill(row, col, player, pieceType, board)
+
+    def whereCanIMove():
+        for board, boardPieces in pieces:
+            for row, col, player, pieceType in boardPieces:
+                checkerLogic.whereCanIMove(row, col, player, pieceType, board)
+
+    def killPaths():
+        for board, boardPieces in pieces:
+            for row, col, player, pieceType in boardPieces:
+                checkerLogic.killPaths(row, col, player, pieceType, board)
+
+    def possibleMoves():
+        for name, board, player in positions:
+            checkerLogic.possibleMoves(player, board)
+
+    def produceModelBoard():
+        for name, board, player in positions:
+            checkerLogic.produceModelBoard(board)
+
+    def encodePosition():
+        for state in states:
+            positionCode.encode(state)
+
+    def decodePosition():
+        for data in codes:
+            positionCode.decodePosition(data)
+
+    def rankMove():
+        for board, player, boardMoves in moves:
+            for move in boardMoves:
+                checkerLogic.rankMove(move, board)
+
+    def evaluate():
+        for name, board, player in positions:
+            checkerSearch.evaluate(board, player)
+
+    def chooseComputerMove():
+        for name, board, player in positions:
+            #the search has to start from nothing every time
+            if cfg.transpositionTable != None:
+                cfg.transpositionTable.clear()
+
+            state = gameState.GameState(
+                checkerLogic.produceModelBoard(board), player
+                )
+            if not state.isTerminal():
+                checkerLogic.chooseComputerMove(
+                    state, cfg.PLAYER_CPU_SMART, SEARCH_DEPTH
+                    )
+
+    return {
+        "whereCanIKill": whereCanIKill,
+        "whereCanIMove": whereCanIMove,
+        "killPaths": killPaths,
+        "possibleMoves": possibleMoves,
+        "produceModelBoard": produceModelBoard,
+        "encodePosition": encodePosition,
+        "decodePosition": decodePosition,
+        "rankMove": rankMove,
+        "evaluate": evaluate,
+        "chooseComputerMove": chooseComputerMove
+        }
+
+
+def timeBenchmark(function, repeat):
+    """runs the function enough times to take at least a tenth of a second,
+repeat times over, and returns the fastest time of one run in seconds"""
+
+    #find how many runs take long enough to time well
+    runs = 1
+    while True:
+        startTime = time.perf_counter()
+        for i in range(runs):
+            function()
+        seconds = time.perf_counter() - startTime
+
+        if seconds >= .1:
+            break
+        runs *= 2
+
+    best = seconds / runs
+    for i in range(repeat - 1):
+        startTime = time.perf_counter()
+        for i in range(runs):
+            function()
+        best = min(best, (time.perf_counter() - startTime) / runs)
+
+    return best
+
+
+def machineInfo():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation()
+        }
+
+
+def runBenchmarks(names, repeat, engine,
+                  workers=cfg.DEFAULT_SEARCH_WORKERS):
+    cfg.useBitboards = engine == "bitboards"
+    cfg.searchWorkers = workers
+    #a move found in the book or the tablebase isn't searched
+    cfg.useOpeningBook = False
+    cfg.useTablebase = False
+    cfg.rng.seed(0)
+
+    benchmarks = makeBenchmarks(loadPositions())
+    results = {}
+
+    for name in names:
+        seconds = timeBenchmark(benchmarks[name], repeat)
+        results[name] = seconds
+        print("%-20s %10.1f microseconds" %(name, seconds * 1e6))
+
+    return results
+
+def findRegressions(results, baseline, threshold):
+    """returns a list of (name, seconds, baseline seconds) for every result
+that is slower than its baseline by more than the threshold"""
+
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + threshold):
+            regressions.append((name, seconds, baseline[name]))
+
+    return regressions
+
+
+def main(args=None):
+    benchmarkNames = list(makeBenchmarks([]).keys())
+
+    parser = argparse.ArgumentParser(
+        description="times the move generator and search functions"
+        )
+    parser.add_argument(
+        "--output", default=None,
+        help="the json file to save the results in"
+        )
+    parser.add_argument(
+        "--baseline", default=None,
+        help="a json file from an earlier run to compare the results with"
+        )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="how much slower than the baseline is a regression"
+        " as a fraction (default %.2f, meaning %d%%%% slower)"
+        %(DEFAULT_THRESHOLD, DEFAULT_THRESHOLD * 100)
+        )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="how many times each benchmark is timed, the fastest time is"
+        " kept (default %d)" %DEFAULT_REPEAT
+        )
+    parser.add_argument(
+        "--engine", choices=["tiles", "bitboards"], default="bitboards",
+        help="the move generator to use (default bitboards)"
+        )
+    parser.add_argument(
+        "--workers", type=int, default=cfg.DEFAULT_SEARCH_WORKERS,
+        help="how many processes the search uses, see parallelSearch.py"
+        " (default %d)" %cfg.DEFAULT_SEARCH_WORKERS
+        )
+    parser.add_argument(
+        "benchmarks", nargs="*",
+        help="the benchmarks to run, out of %s (default all of them)"
+        %", ".join(benchmarkNames)
+        )
+    args = parser.parse_args(args)
+
+    for name in args.benchmarks:
+        if name not in benchmarkNames:
+            parser.error("unknown benchmark %s" %name)
+
+    names = args.benchmarks or benchmarkNames
+    results = runBenchmarks(
+        names, args.repeat, args.engine, args.workers
+        )
+
+    report = {
+        "machine": machineInfo(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "engine": args.engine,
+        "workers": args.workers,
+        "results": results
+        }
+
+    if args.output != None:
+        with open(args.output, "w") as outputFile:
+            json.dump(report, outputFile, indent=4)
+
+    if args.baseline == None:
+        return 0
+
+    with open(args.baseline) as baselineFile:
+        baseline = json.load(baselineFile)
+
+    if baseline.get("machine") != report["machine"]:
+        print("warning: the baseline was made on a different machine")
+
+    regressions = findRegressions(
+        results, baseline["results"], args.threshold
+        )
+
+    if len(regressions) == 0:
+        print("no regressions")
+        return 0
+
+    for name, seconds, baselineSeconds in regressions:
+        print("REGRESSION %s: %.1f microseconds, baseline %.1f (%+.0f%%)"
+              %(name, seconds * 1e6, baselineSeconds * 1e6,
+                (seconds / baselineSeconds - 1) * 100))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
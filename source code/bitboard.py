@@ -0,0 +1,397 @@
+"""This file has a bitboard version of the checker move generator.
+
+Pieces can only ever stand on the dark tiles of the board, so every dark
+tile is given a square number and a whole board is kept in three integers
+with one bit per square: the pieces of player one, the pieces of player two
+and the kings of both players. Moves, jumps and obligated kills are then found
+for all of a player's pieces at once with shifts and masks instead of looking
+at the tiles one at a time.
+
+Square numbers go left to right along each row starting at row 0, so the
+square of (row, col) is row * SQUARES_PER_ROW + col // 2. Moves are given and
+returned in the same form that checkerLogic uses, a list of (row, col)
+tuples.
+
+A ModelBoard keeps its bitboards up to date as its tiles change, so
+fromBoard() only has to look at the tiles of other boards."""
+
+import cfg
+import checkerLogic
+
+
+#the number of dark tiles in every row and on the whole board
+SQUARES_PER_ROW = cfg.NUM_COLS // 2
+NUM_SQUARES = SQUARES_PER_ROW * cfg.NUM_ROWS
+ALL_SQUARES = (1 << NUM_SQUARES) - 1
+
+#the four diagonal directions. They are in the same order that
+#checkerLogic.whereCanIKill() checks them in, so moves come out in the
+#same order as well
+UP_LEFT = 0
+UP_RIGHT = 1
+DOWN_LEFT = 2
+DOWN_RIGHT = 3
+
+#(row change, col change) for each direction
+DIRECTIONS = [(1, -1), (1, 1), (-1, -1), (-1, 1)]
+
+ALL_DIRECTIONS = (UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT)
+
+#men can only move forwards, player one moves up and player two moves down
+FORWARD = {
+    cfg.PLAYER_1: (UP_LEFT, UP_RIGHT),
+    cfg.PLAYER_2: (DOWN_LEFT, DOWN_RIGHT)
+    }
+
+#the row that a man has to reach to become a king
+KING_ROW = {cfg.PLAYER_1: cfg.NUM_ROWS - 1, cfg.PLAYER_2: 0}
+
+
+def isDarkTile(row, col):
+    """pieces are only ever placed on tiles where this is true"""
+    return col % 2 == row % 2
+
+def coordsToSquare(row, col):
+    """returns the square number of the dark tile at (row, col)"""
+    return row * SQUARES_PER_ROW + col // 2
+
+#the (row, col) tuple of every square
+squareCoords = []
+for row in range(cfg.NUM_ROWS):
+    for col in range(cfg.NUM_COLS):
+        if isDarkTile(row, col):
+            squareCoords.append((row, col))
+
+#the bit of the square of every tile, indexed with [row][col]. It is 0 for
+#the light tiles, which have no square
+squareBits = [
+    [1 << coordsToSquare(row, col) if isDarkTile(row, col) else 0
+     for col in range(cfg.NUM_COLS)]
+    for row in range(cfg.NUM_ROWS)
+    ]
+
+#where the kings are in the [player one, player two, kings] list that a
+#ModelBoard keeps, the pieces of a player are at player - cfg.PLAYER_1
+KINGS = 2
+
+
+#these tables are indexed with [direction][square].
+#stepTo is the square one step away, jumpOver is the square that a kill
+#would jump over and jumpTo is where the killing piece would land.
+#-1 is used when the move would leave the board
+stepTo = [[-1] * NUM_SQUARES for direction in DIRECTIONS]
+jumpOver = [[-1] * NUM_SQUARES for direction in DIRECTIONS]
+jumpTo = [[-1] * NUM_SQUARES for direction in DIRECTIONS]
+
+#the same information as lists of (shift, mask) pairs so that a whole
+#bitboard can be moved at once. The mask has every square whose target
+#in that direction is shift squares away. The shift of a step is different
+#on even and odd rows which is why there can be more than one pair.
+#jumpShifts holds (over shift, landing shift, mask) triples instead
+stepShifts = [{} for direction in DIRECTIONS]
+jumpShifts = [{} for direction in DIRECTIONS]
+
+for direction, (rowChange, colChange) in enumerate(DIRECTIONS):
+    for square, (row, col) in enumerate(squareCoords):
+
+        if (
+            0 <= row + rowChange < cfg.NUM_ROWS
+            and 0 <= col + colChange < cfg.NUM_COLS
+            ):
+            to = coordsToSquare(row + rowChange, col + colChange)
+            stepTo[direction][square] = to
+
+            shift = to - square
+            stepShifts[direction][shift] = (
+                stepShifts[direction].get(shift, 0) | 1 << square
+                )
+
+        if (
+            0 <= row + 2*rowChange < cfg.NUM_ROWS
+            and 0 <= col + 2*colChange < cfg.NUM_COLS
+            ):
+            over = coordsToSquare(row + rowChange, col + colChange)
+            to = coordsToSquare(row + 2*rowChange, col + 2*colChange)
+            jumpOver[direction][square] = over
+            jumpTo[direction][square] = to
+
+            shifts = (over - square, to - square)
+            jumpShifts[direction][shifts] = (
+                jumpShifts[direction].get(shifts, 0) | 1 << square
+                )
+
+stepShifts = [list(shifts.items()) for shifts in stepShifts]
+jumpShifts = [
+    [(over, to, mask) for (over, to), mask in shifts.items()]
+    for shifts in jumpShifts
+    ]
+
+
+
+def shiftBack(bits, shift):
+    """moves every bit shift squares back towards square 0 so that the bit
+of a target square lines up with the bit of the square it is reached from"""
+    if shift > 0:
+        return bits >> shift
+    return (bits << -shift) & ALL_SQUARES
+
+def squaresIn(bits):
+    """yields the square number of every set bit, lowest square first"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+def countPieces(bits):
+    return bin(bits).count("1")
+
+def directionsFor(player, isKing):
+    """the directions that a piece is allowed to move in"""
+    if isKing:
+        return ALL_DIRECTIONS
+    return FORWARD[player]
+
+def ownAndEnemy(player, p1, p2):
+    if player == cfg.PLAYER_1:
+        return p1, p2
+    return p2, p1
+
+
+def fromBoard(board):
+    """takes in a 2d list of either Tile or ModelTiles and returns the
+tuple (player one pieces, player two pieces, kings).
+
+None is returned if the board can not be turned into bitboards, which
+happens when a custom board has a piece on a light tile or the board has an
+odd number of columns. The caller should then fall back to the tile based
+functions in checkerLogic."""
+
+    if isinstance(board, checkerLogic.ModelBoard):
+        #the model board has kept them up to date
+        if board.bitboards == None:
+            return None
+        return tuple(board.bitboards)
+
+    return findBitboards(board)
+
+def findBitboards(board):
+    """works out what fromBoard() returns by looking at every piece of the
+board"""
+
+    if cfg.NUM_COLS % 2 != 0:
+        return None
+
+    p1 = p2 = kings = 0
+    pieces = checkerLogic.pieceIndex(board)
+
+    for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+        for row, col in pieces[player]:
+            if not isDarkTile(row, col):
+                return None
+
+            bit = 1 << coordsToSquare(row, col)
+            if player == cfg.PLAYER_1:
+                p1 |= bit
+            else:
+                p2 |= bit
+
+            if board[row][col].pieceType == cfg.CHECKER_KING:
+                kings |= bit
+
+    return p1, p2, kings
+
+
+def toBoard(p1, p2, kings):
+    """makes a ModelBoard from the (player one pieces, player two pieces,
+kings) bitboards, the reverse of fromBoard()"""
+
+    board = []
+    for row in range(cfg.NUM_ROWS):
+        board.append([
+            checkerLogic.ModelTile(cfg.UNOCCUPIED, cfg.NO_PIECE)
+            for col in range(cfg.NUM_COLS)
+            ])
+
+    for player, pieces in ((cfg.PLAYER_1, p1), (cfg.PLAYER_2, p2)):
+        for square in squaresIn(pieces):
+            row, col = squareCoords[square]
+            board[row][col].player = player
+            if kings >> square & 1:
+                board[row][col].pieceType = cfg.CHECKER_KING
+            else:
+                board[row][col].pieceType = cfg.CHECKER_MAN
+
+    return checkerLogic.ModelBoard(board)
+
+
+def movers(player, p1, p2, kings):
+    """returns a bitboard with every piece of the player that can make
+a simple one space move"""
+
+    own, enemy = ownAndEnemy(player, p1, p2)
+    empty = ~(p1 | p2) & ALL_SQUARES
+
+    result = 0
+    for direction in ALL_DIRECTIONS:
+        if direction in FORWARD[player]:
+            pieces = own
+        else:
+            #only kings can move backwards
+            pieces = own & kings
+
+        for shift, mask in stepShifts[direction]:
+            result |= pieces & mask & shiftBack(empty, shift)
+
+    return result
+
+def jumpers(player, p1, p2, kings):
+    """returns a bitboard with every piece of the player that can kill.
+These are the obligated pieces of the player"""
+
+    own, enemy = ownAndEnemy(player, p1, p2)
+    empty = ~(p1 | p2) & ALL_SQUARES
+
+    result = 0
+    for direction in ALL_DIRECTIONS:
+        if direction in FORWARD[player]:
+            pieces = own
+        else:
+            pieces = own & kings
+
+        for overShift, toShift, mask in jumpShifts[direction]:
+            result |= (
+                pieces & mask
+                & shiftBack(enemy, overShift)
+                & shiftBack(empty, toShift)
+                )
+
+    return result
+
+
+def killPathsAux(square, player, isKing, occupied, enemy, path, moves):
+
+    #check if the piece should now be treated as a king
+    if not isKing and squareCoords[square][0] == KING_ROW[player]:
+        isKing = True
+
+    #add myself onto the path. Now path points to a new object
+    path = path + [squareCoords[square]]
+
+    isDeadEnd = True
+
+    for direction in directionsFor(player, isKing):
+        over = jumpOver[direction][square]
+        if over == -1:
+            continue
+        to = jumpTo[direction][square]
+
+        if enemy >> over & 1 and not occupied >> to & 1:
+            isDeadEnd = False
+
+            #the killed piece is removed and the killer moves to its
+            #new square before looking for the next kill
+            killPathsAux(
+                to, player, isKing,
+                (occupied & ~(1 << over | 1 << square)) | 1 << to,
+                enemy & ~(1 << over),
+                path, moves
+                )
+
+    if isDeadEnd:
+        #this path is now a dead end, so add the finalized path to the result
+        moves.append(path)
+
+def killPaths(row, col, player, isKing, p1, p2, kings):
+    """finds all of the different killing paths that could be taken with
+the piece at (row, col). Works like checkerLogic.killPaths() but on
+bitboards"""
+
+    moves = []
+
+    square = coordsToSquare(row, col)
+    own, enemy = ownAndEnemy(player, p1, p2)
+
+    #the piece has to be able to make the first kill as it is now
+    for direction in directionsFor(player, isKing):
+        over = jumpOver[direction][square]
+        if (
+            over != -1 and enemy >> over & 1
+            and not (p1 | p2) >> jumpTo[direction][square] & 1
+            ):
+            killPathsAux(square, player, isKing, p1 | p2, enemy, [], moves)
+            break
+
+    return moves
+
+
+def possibleMoves(player, p1, p2, kings):
+    """returns a list of all possible moves that the player could make,
+each move being a list of (row, col) tuples. Works like
+checkerLogic.possibleMoves(); if any kill can be made then only kill moves
+are returned."""
+
+    moveList = []
+
+    #step one is to look for kill moves
+    killers = jumpers(player, p1, p2, kings)
+    if killers:
+        for square in squaresIn(killers):
+            row, col = squareCoords[square]
+            moveList.extend(
+                killPaths(row, col, player, kings >> square & 1, p1, p2, kings)
+                )
+        return moveList
+
+    empty = ~(p1 | p2) & ALL_SQUARES
+
+    for square in squaresIn(movers(player, p1, p2, kings)):
+        for direction in directionsFor(player, kings >> square & 1):
+            to = stepTo[direction][square]
+            if to != -1 and empty >> to & 1:
+                #the original location + the destination
+                moveList.append([squareCoords[square], squareCoords[to]])
+
+    return moveList
+
+
+def applyMove(move, p1, p2, kings):
+    """applies a move (a list of (row, col) tuples) to the bitboards and
+returns the new (player one pieces, player two pieces, kings) tuple.
+
+Like checkerLogic.makeModelMove() this does not check that the move is
+valid. A man that reaches its king row at any point of the move is
+crowned."""
+
+    start = coordsToSquare(move[0][0], move[0][1])
+    end = coordsToSquare(move[-1][0], move[-1][1])
+
+    player = cfg.PLAYER_1 if p1 >> start & 1 else cfg.PLAYER_2
+    isKing = kings >> start & 1
+
+    #every two row jump kills the piece in the middle
+    killed = 0
+    for i in range(len(move) - 1):
+        prev = move[i]
+        curr = move[i+1]
+
+        if abs(curr[0] - prev[0]) == 2:
+            killed |= 1 << coordsToSquare(
+                (prev[0] + curr[0]) // 2, (prev[1] + curr[1]) // 2
+                )
+        if curr[0] == KING_ROW[player]:
+            isKing = True
+
+    #a king can end a chain of kills on the square that it started on, so
+    #the start has to be cleared before the end is set
+    if player == cfg.PLAYER_1:
+        p1 = (p1 & ~(1 << start)) | 1 << end
+        p2 &= ~killed
+    else:
+        p2 = (p2 & ~(1 << start)) | 1 << end
+        p1 &= ~killed
+
+    kings &= ~(killed | 1 << start)
+    if isKing:
+        kings |= 1 << end
+
+    return p1, p2, kings
@@ -4,8 +4,9 @@ in the module
 Variables in all caps are constants and should not be changed.
 Other variables are free to change."""
 
-import tkinter as tk
-from pygame import mixer
+import queue
+import random
+import threading
 
 #colors
 COLOR_1 = "wheat1"
@@ -17,13 +18,28 @@ PLAYER_2_COLOR = "blue"
 TILE_WIDTH = 8
 TILE_HEIGHT = 4
 
+#when True the board is drawn on a single canvas instead of being made of
+#a button for every tile, which is much faster to set up and redraw on big
+#boards
+useCanvasBoard = False
+
+#the size of a tile on the canvas board in pixels, and how much of the
+#tile is left around a piece
+CANVAS_TILE_SIZE = 64
+CANVAS_PIECE_MARGIN = 8
+
+#the color and width of the outline of the selected tile on the canvas
+CANVAS_SELECTED_COLOR = "gold"
+CANVAS_SELECTED_WIDTH = 4
+
 #Board size
 NUM_COLS = 8
 NUM_ROWS = 8
 
-#reliefs
-SELECTED_RELIEF = tk.SUNKEN
-UNSELECTED_RELIEF = tk.FLAT
+#reliefs, the values of tk.SUNKEN and tk.FLAT. They are written out so
+#that the tools without a gui can import this file without tkinter
+SELECTED_RELIEF = "sunken"
+UNSELECTED_RELIEF = "flat"
 
 #the color of the top dashboard where the displays are
 WINDOW_COLOR = "snow"
@@ -64,9 +80,36 @@ compThread = None
 THREAD_NO_ACTION = 0
 THREAD_MAKE_MOVE = 1
 THREAD_EXIT_GAME = 2
+#the program is closing and the thread should stop
+THREAD_SHUT_DOWN = 3
 
 threadMode = THREAD_NO_ACTION
 
+#the thread sleeps on this until threadMode is changed with
+#checkerboard.setThreadMode()
+threadCondition = threading.Condition()
+
+#how many seconds closing the program waits for the thread to finish the
+#move it is making
+SHUT_DOWN_TIMEOUT = 2
+
+#tkinter may only be used from the main thread, so changes to the gui made
+#by the computer player thread wait in this queue until the main thread
+#makes them, see checkerboard.configWidget()
+uiQueue = queue.Queue()
+
+#the kinds of changes in the queue
+UI_CONFIG = 0
+UI_CALL = 1
+
+#how often in milliseconds the main thread makes the queued changes
+UI_FRAME_MS = 16
+
+
+
+#the random numbers used by the computer players and to pick the first
+#player. Seeding it with rng.seed() makes games that can be played again
+rng = random.Random()
 
 
 #the delay between each action by any cpu player
@@ -135,12 +178,70 @@ PLAYER_CPU_SMART = 3
 #this is used to tell what type of player is (usually the active player)
 playerType = {PLAYER_1: PLAYER_UNDEFINED, PLAYER_2: PLAYER_UNDEFINED}
 
+#how many moves ahead the smart cpu player of each player searches
+MIN_SEARCH_DEPTH = 1
+MAX_SEARCH_DEPTH = 10
+DEFAULT_SEARCH_DEPTH = 5
+searchDepth = {PLAYER_1: DEFAULT_SEARCH_DEPTH, PLAYER_2: DEFAULT_SEARCH_DEPTH}
+
+#a smart cpu either always searches searchDepth moves ahead, or it
+#searches deeper and deeper for as long as the delay time and then moves.
+#In that case searchDepth is the deepest it will go
+SEARCH_FIXED_DEPTH = 0
+SEARCH_TIMED = 1
+
+DEFAULT_SEARCH_MODE = SEARCH_TIMED
+searchMode = DEFAULT_SEARCH_MODE
+
+#the shortest time that a timed search is given, even with no delay
+MIN_THINK_TIME = .1
+
+#the size in megabytes of the transposition table that the smart cpu
+#remembers searched positions in. 0 turns the table off
+DEFAULT_TRANSPOSITION_TABLE_MB = 16
+transpositionTableMB = DEFAULT_TRANSPOSITION_TABLE_MB
+
+#the table itself, made when the game starts or the first time the smart
+#cpu searches. It is made in shared memory when the search uses more than
+#one process and its size can't be changed once it is made
+transpositionTable = None
+
+#how many processes the smart cpu searches in. With more than one the moves
+#of each position are shared out between that many processes, which makes
+#the search faster on a computer with that many cores, see parallelSearch.py
+DEFAULT_SEARCH_WORKERS = 1
+searchWorkers = DEFAULT_SEARCH_WORKERS
+
+#when True the smart cpu plays the moves in the opening book instead of
+#searching while the game is still in the book, see openingBook.py
+useOpeningBook = True
+OPENING_BOOK_FILE = "openingBook.json"
+
+#when True the smart cpu plays perfectly once there are tablebasePieces or
+#fewer pieces left on the board, if the endgame tablebase has been made, see
+#endgameTablebase.py
+useTablebase = True
+DEFAULT_TABLEBASE_PIECES = 3
+tablebasePieces = DEFAULT_TABLEBASE_PIECES
+TABLEBASE_DIRECTORY = "tablebase"
+
+#when True every game played in the gui is added to the PDN file
+#GAME_RECORD_FILE as it is played, see gameRecord.py. gameRecord is the
+#gameRecord.RecordWriter of the file, opened when the first game starts
+recordGames = True
+GAME_RECORD_FILE = "games.pdn"
+gameRecord = None
+
 
 
 #this is used as a tuple with the form (row, column) to record the last
 #selected tile
 lastSelectedItem = None
 
+#the gameState.GameState of the game in progress. The variables below
+#are copies of what is in it that are read by the gui
+gameState = None
+
 #these are used by the checker game logic
 inKillChain = False
 #this is a tuple that represents the piece that has to complete the kill chain
@@ -151,20 +252,26 @@ chainKiller = None
 #the lists contain tuples with the form (row, col)
 obligatedPieces = {PLAYER_1: [], PLAYER_2: []}
 
+#when True the computer player finds its moves with the bitboard move
+#generator in bitboard.py instead of looking at every tile
+useBitboards = True
+
 
 #a 2d list that has every tile on the board
 boardTiles = []
 
+#the (row, col) of every piece of each player on boardTiles, kept up to
+#date by editTile()
+boardPieces = {PLAYER_1: set(), PLAYER_2: set()}
+
+#the same pieces as a bitmask for each player with the bit
+#row * NUM_COLS + col set for every piece, also kept up to date by editTile()
+boardOccupancy = {PLAYER_1: 0, PLAYER_2: 0}
+
 #the tkinter frames that hold all the tiles in the game
 frames = []
 
-#sounds
-mixer.init(44100)
-pressButtonSound = mixer.Sound("sounds/pressButtonSound.wav")
-depressButtonSound = mixer.Sound("sounds/depressButtonSound.wav")
-errorSound = mixer.Sound("sounds/errorSound.wav")
-killSound = mixer.Sound("sounds/killSound.wav")
-moveSound = mixer.Sound("sounds/moveSound.wav")
-
-#sounds not currently used
-menuButtonSound = mixer.Sound("sounds/menuButtonSound.wav")
+#sounds are played with soundManager.play(). When this is False no sounds
+#are played and the audio device is never opened
+soundEnabled = True
+SOUND_FREQUENCY = 44100
@@ -1,28 +1,44 @@
-"""This file contains two functions used to run a game of checkers."""
+"""This file contains the functions used to run a game of checkers.
+
+The rules themselves are kept in gameState.GameState; the functions here
+connect a GameState to the gui and compute the moves of the computer
+player."""
 
-import random
 import time
-from pygame import mixer
-import checkerboard as chb
 import cfg
+import soundManager
+import bitboard
+import gameState
+import checkerSearch
+import endgameTablebase
+import gameRecord
+import openingBook
+import zobrist
+
+try:
+    import checkerboard as chb
+except ImportError:
+    #without tkinter there is no gui, the tools that don't use it still
+    #work
+    chb = None
 
 def invalidMoveResponse():
     """lets the player know they have made an invalid move"""
     chb.deselectTile()
     chb.updateDisplay2(cfg.INVALID_MOVE)
-    cfg.errorSound.play()
+    soundManager.play(soundManager.ERROR_SOUND)
     return False
 
 def pleaseFinishChainResponse():
     """the piece's color will be changed so that the player
 knows what the correct piece to move is"""
     colorMe = cfg.boardTiles[cfg.chainKiller[0]][cfg.chainKiller[1]]
-    colorMe.config(bg="yellow")
+    chb.configWidget(colorMe, bg="yellow")
 
     chb.deselectTile()
     
     chb.updateDisplay2("INVALID: you must kill with this piece")
-    cfg.errorSound.play()
+    soundManager.play(soundManager.ERROR_SOUND)
     return False
 
 def pleaseHandleObligatedPieces():
@@ -31,11 +47,11 @@ Highlights all pieces that could attack with"""
 
     chb.deselectTile()
     chb.updateDisplay2("INVALID: you must attack")
-    cfg.errorSound.play()
+    soundManager.play(soundManager.ERROR_SOUND)
 
     for coords in cfg.obligatedPieces[cfg.activePlayer]:
         curr = cfg.boardTiles[coords[0]][coords[1]]
-        curr.config(bg="yellow")
+        chb.configWidget(curr, bg="yellow")
         
         
     return False
@@ -46,11 +62,11 @@ to their own team color"""
     
     for coords in cfg.obligatedPieces[cfg.PLAYER_1]:
         curr = cfg.boardTiles[coords[0]][coords[1]]
-        curr.config(bg=cfg.PLAYER_1_COLOR)
+        chb.configWidget(curr, bg=cfg.PLAYER_1_COLOR)
 
     for coords in cfg.obligatedPieces[cfg.PLAYER_2]:
         curr = cfg.boardTiles[coords[0]][coords[1]]
-        curr.config(bg=cfg.PLAYER_2_COLOR)
+        chb.configWidget(curr, bg=cfg.PLAYER_2_COLOR)
             
 
 def declareWinner(winner, looserResigned=False):
@@ -64,179 +80,175 @@ def declareWinner(winner, looserResigned=False):
 
     if looserResigned:
         winText = "oppenent resigns... " + winText
+
+    if cfg.gameRecord != None:
+        cfg.gameRecord.endGame(gameRecord.RESULTS[winner])
         
     chb.updateDisplay1(winText)
     cfg.activePlayer = cfg.GAME_OVER
 
-def shouldIBeKing(row, col):
-    """determines if the passed in piece should be a king and
-if so makes the piece a king"""
-    
-    kingCandidate = cfg.boardTiles[row][col]
-    
-    if kingCandidate.pieceType == cfg.CHECKER_KING:
-        return False
+def buildMoveTables(numRows, numCols):
+    """works out for every tile of a numRows by numCols board where a piece
+on it could step to and jump to. Returns the tuple (stepTable, jumpTable).
 
-    if row == 7 and kingCandidate.player == cfg.PLAYER_1:
-        chb.editTile(row, col, cfg.PLAYER_1, cfg.CHECKER_KING)
-        return True
+Both tables are dictionaries keyed by (player, isKing) holding a 2d list
+indexed with [row][col]. A stepTable entry is a list of the (row, col)
+tiles one step away and a jumpTable entry is a list of
+((row, col) of the jumped tile, (row, col) of the landing tile) tuples.
+Tiles that would be off the board are left out, and the directions are
+always in the order up left, up right, down left, down right."""
 
-    if row == 0 and kingCandidate.player == cfg.PLAYER_2:
-        chb.editTile(row, col, cfg.PLAYER_2, cfg.CHECKER_KING)
-        return True
+    up = [(1, -1), (1, 1)]
+    down = [(-1, -1), (-1, 1)]
 
-    return False
+    directions = {
+        (cfg.PLAYER_1, False): up,
+        (cfg.PLAYER_2, False): down,
+        (cfg.PLAYER_1, True): up + down,
+        (cfg.PLAYER_2, True): up + down
+        }
+
+    stepTable = {}
+    jumpTable = {}
+
+    for key, pieceDirections in directions.items():
+        stepTable[key] = []
+        jumpTable[key] = []
+
+        for row in range(numRows):
+            stepTable[key].append([])
+            jumpTable[key].append([])
+
+            for col in range(numCols):
+                steps = []
+                jumps = []
+
+                for rowChange, colChange in pieceDirections:
+                    if (
+                        0 <= row + rowChange < numRows
+                        and 0 <= col + colChange < numCols
+                        ):
+                        steps.append((row + rowChange, col + colChange))
+
+                    if (
+                        0 <= row + 2*rowChange < numRows
+                        and 0 <= col + 2*colChange < numCols
+                        ):
+                        jumps.append((
+                            (row + rowChange, col + colChange),
+                            (row + 2*rowChange, col + 2*colChange)
+                            ))
+
+                stepTable[key][row].append(steps)
+                jumpTable[key][row].append(jumps)
+
+    return stepTable, jumpTable
+
+#the tables are built once for the size of the board in cfg, so finding
+#moves never has to check for the edges of the board
+stepTable, jumpTable = buildMoveTables(cfg.NUM_ROWS, cfg.NUM_COLS)
+
+
+def tileBit(row, col):
+    """the bit of a tile in an occupancy bitmask, see occupancyOf()"""
+    return 1 << (row * cfg.NUM_COLS + col)
+
+def buildQuadrantMasks(numRows, numCols):
+    """works out for every tile of a numRows by numCols board the part of
+the board that a simple move landing on the tile is aimed at. Returns a
+dictionary keyed by (goesUp, goesRight) holding a 2d list of occupancy
+bitmasks indexed with [row][col]. Each mask has every tile from the row and
+column of the landing tile to the edges of the board in those directions"""
+
+    masks = {}
+
+    for goesUp in (True, False):
+        for goesRight in (True, False):
+            masks[(goesUp, goesRight)] = []
+
+            for row in range(numRows):
+                masks[(goesUp, goesRight)].append([])
+
+                if goesUp:
+                    rows = range(row, numRows)
+                else:
+                    rows = range(0, row + 1)
+
+                for col in range(numCols):
+                    if goesRight:
+                        cols = range(col, numCols)
+                    else:
+                        cols = range(0, col + 1)
+
+                    mask = 0
+                    for maskRow in rows:
+                        for maskCol in cols:
+                            mask |= 1 << (maskRow * numCols + maskCol)
 
-def whereCanIKill(row, col, player, pieceType):
+                    masks[(goesUp, goesRight)][row].append(mask)
+
+    return masks
+
+#used by rankMove() to find out if a move is aimed at an enemy piece
+quadrantMasks = buildQuadrantMasks(cfg.NUM_ROWS, cfg.NUM_COLS)
+
+
+def whereCanIKill(row, col, player, pieceType, board=None):
     """Checks if the piece in the current space can kill. Returns a list
 of tuples each with a row and a column indicating what moves the player
 could take to kill with the current location. The player parameter is for
 who the attacking piece belongs to. The piece type is the player var
 lets the function know ifthe piece is a king or not.
 The space on the board does not actually have to have a piece on it
-for the calculation to be done."""
+for the calculation to be done. The board parameter is the 2d list of
+tiles to look at; if it is None the game board is used."""
 
     killMoves = []
 
-    board=cfg.boardTiles
+    if board == None:
+        board = cfg.boardTiles
     
-    isKing = True if pieceType == cfg.CHECKER_KING else False
-    
-    enemy = 0
     if player == cfg.PLAYER_1:
         enemy = cfg.PLAYER_2
     else:
         enemy = cfg.PLAYER_1
-    
-    if (
-        (isKing or player == cfg.PLAYER_1) and row != 6 and row != 7
-        ):
-       #checks if can attack upwards
-        #check left
-        if (
-            col != 0 and col != 1
-            and board[row+1][col-1].player == enemy
-            and board[row+2][col-2].player == cfg.UNOCCUPIED
-            ):
-            #we dont wanna check col = 0 and 1 because it will go out of bounds
-            killMoves.append((row+2, col-2))
 
-        #check right
-        if (
-            col != 6 and col != 7
-            and board[row+1][col+1].player == enemy
-            and board[row+2][col+2].player == cfg.UNOCCUPIED
-            ):
-            #we dont wanna check col = 6 and 7 because it will go out of bounds
-            killMoves.append((row+2, col+2))
+    jumps = jumpTable[player, pieceType == cfg.CHECKER_KING][row][col]
 
-    if (
-        (isKing or player == cfg.PLAYER_2) and (row != 0 and row != 1)
-        ):
-        #checks if can attack downwards
+    for over, dest in jumps:
         if (
-            col != 0 and col != 1
-            and board[row-1][col-1].player == enemy
-            and board[row-2][col-2].player == cfg.UNOCCUPIED
+            board[over[0]][over[1]].player == enemy
+            and board[dest[0]][dest[1]].player == cfg.UNOCCUPIED
             ):
-            killMoves.append((row-2, col-2))
-
-        if (
-            col != 6 and col != 7
-            and board[row-1][col+1].player == enemy
-            and board[row-2][col+2].player == cfg.UNOCCUPIED
-            ):
-            killMoves.append((row-2, col+2))
+            killMoves.append(dest)
 
     return killMoves
 
 
-def whereCanIMove(row, col, player, pieceType):
+def whereCanIMove(row, col, player, pieceType, board=None):
     """Checks if the piece in the current space can move. Returns a list
 of tuples each with a row and a column indicating what places the player
 could move to with the current location. The player parameter is for
 who the moving piece belongs to. The piece type is the player var
 lets the function know ifthe piece is a king or not.
 The space on the board does not actually have to have a piece on it
-for the calculation to be done."""
+for the calculation to be done. The board parameter is the 2d list of
+tiles to look at; if it is None the game board is used."""
     
     moves = []
 
-    board=cfg.boardTiles
-    
-    isKing = True if pieceType == cfg.CHECKER_KING else False
-    
-    if (isKing or player == cfg.PLAYER_1) and row != 7:
-       #checks if can attack upwards
-        #check left
-        if (
-            col != 0
-            and board[row+1][col-1].player ==  cfg.UNOCCUPIED
-            ):
-            moves.append((row+1, col-1))
-
-        #check right
-        if (
-            col != 7
-            and board[row+1][col+1].player == cfg.UNOCCUPIED
-            ):
-            moves.append((row+1, col+1))
+    if board == None:
+        board = cfg.boardTiles
 
-    if (isKing or player == cfg.PLAYER_2) and row != 0:
-        #checks if can attack downwards
-        if (
-            col != 0
-            and board[row-1][col-1].player == cfg.UNOCCUPIED
-            ):
-            moves.append((row-1, col-1))
+    steps = stepTable[player, pieceType == cfg.CHECKER_KING][row][col]
 
-        if (
-            col != 7
-            and board[row-1][col+1].player == cfg.UNOCCUPIED
-            ):
-            moves.append((row-1, col+1))
+    for dest in steps:
+        if board[dest[0]][dest[1]].player == cfg.UNOCCUPIED:
+            moves.append(dest)
 
     return moves
 
 
-def checkForObligatedPieces(player):
-    """checks for any pieces for this player that can attack now"""
-    for row in range(len(cfg.boardTiles)):
-        for col, tile in enumerate(cfg.boardTiles[row]):
-            if (
-                tile.player == player
-                and len(whereCanIKill(
-                    row, col, tile.player, tile.pieceType)) != 0
-                ):
-                    cfg.obligatedPieces[player].append((row, col))
-
-
-def mustIResign(player):
-    """Checks if all of the active player's pieces cannot move.
-If so then this function ends the game and calls declareWinner with
-the non-resigned player."""
-    
-    for row in range(len(cfg.boardTiles)):
-        for col, tile in enumerate(cfg.boardTiles[row]):
-            
-            if (
-                tile.player == player
-                and (
-                    len(whereCanIMove(
-                    row, col, cfg.activePlayer, tile.pieceType)) != 0
-                or 
-                    len(whereCanIKill(
-                    row, col, cfg.activePlayer, tile.pieceType)) != 0
-                    )
-                ):
-                #if a piece has been found that can move or kill,
-                #return, do not declare a winner
-                return
-            
-    declareWinner(cfg.nonActivePlayer, looserResigned=True)
-        
-
-                
 def populateBoard():
     """sets up a checker game for play. Places checker pieces
 on the board"""
@@ -248,218 +260,142 @@ on the board"""
         return
 
     magicNumber = int(cfg.NUM_ROWS/2 - 1)
+
+    #the number of pieces depends on the size of the board
+    cfg.playerPieces[cfg.PLAYER_1] = 0
+    cfg.playerPieces[cfg.PLAYER_2] = 0
     
     #populate bottom of board (player 1)
     for row in range(magicNumber):
         for col in range(cfg.NUM_COLS):
             if col % 2 == row % 2:
                 chb.editTile(row, col, cfg.PLAYER_1, cfg.CHECKER_MAN)
-    cfg.playerPieces[cfg.PLAYER_1] = cfg.CHECKERS_MAX_PIECES
+                cfg.playerPieces[cfg.PLAYER_1] += 1
 
     #populate bottom of board (player 2)
     for row in range(cfg.NUM_ROWS - magicNumber, cfg.NUM_ROWS):
         for col in range(cfg.NUM_COLS):
             if col % 2 == row % 2:
                 chb.editTile(row, col, cfg.PLAYER_2, cfg.CHECKER_MAN)
-    cfg.playerPieces[cfg.PLAYER_2] = cfg.CHECKERS_MAX_PIECES
+                cfg.playerPieces[cfg.PLAYER_2] += 1
 
-def makeMove(row1, col1, row2, col2):
-    """Computes whether a move is valid and if so makes the move.
-This function returns False if the move is not valid (and nothing was done)
-and True if the move was valid and an action was completed.
-row1 and col1 are for the initial tile and row2, col2 are for the
-destination tile
+def setUpGameState():
+    """makes the GameState for a game that is starting. It is made from the
+tiles on the board, so this is called once the board has been populated and
+the first player has been chosen"""
 
-If a piece can jump another piece after a jump it has to immediately.
-The game will not allow the player to select any piece but this"""
-    
-    curr = cfg.boardTiles[row1][col1]
-    dest = cfg.boardTiles[row2][col2]
+    cfg.gameState = gameState.GameState.fromBoard(
+        cfg.boardTiles, cfg.activePlayer
+        )
+    copyStateToCfg()
 
-    if cfg.activePlayer == cfg.GAME_OVER:
-        #no moves can be made during game over
-        return False
+    startRecord()
 
-    
-    #unhighlights any pieces that might have been earlier highlighted
-    if len(cfg.obligatedPieces[cfg.activePlayer]) != 0:
-        unhighlightPieces()
+    if cfg.gameState.isTerminal():
+        #a custom board can be set up so that the first player can't move
+        declareWinner(cfg.gameState.winner, cfg.gameState.loserResigned)
 
-                    
+def startRecord():
+    """starts the record of the game in cfg.gameRecord, opening the record
+file the first time"""
 
-    if curr.player != cfg.activePlayer:
-        return invalidMoveResponse()
-    
+    if not cfg.recordGames:
+        return
 
-    if curr.pieceType != cfg.CHECKER_KING:
-        #the king can move in any direction
-        if cfg.activePlayer == cfg.PLAYER_1 and row1 >= row2:
-            #player 1 may not move backwards or on the same row
-            return invalidMoveResponse()
+    if cfg.gameRecord == None:
+        cfg.gameRecord = gameRecord.openRecord()
+        if cfg.gameRecord == None:
+            #the file can't be written, so games aren't recorded
+            cfg.recordGames = False
+            return
 
-        if cfg.activePlayer == cfg.PLAYER_2 and row2 >= row1:
-            #player 2 may not move backwards or on the same row
-            return invalidMoveResponse()
+    cfg.gameRecord.startGame(
+        cfg.gameState,
+        gameRecord.playerName(cfg.playerType[cfg.PLAYER_1],
+                              cfg.searchDepth[cfg.PLAYER_1]),
+        gameRecord.playerName(cfg.playerType[cfg.PLAYER_2],
+                              cfg.searchDepth[cfg.PLAYER_2])
+        )
 
-    if abs(row2 - row1) != abs(col2 - col1):
-        #non diagonal movement is invalid
-        return invalidMoveResponse()
+def copyStateToCfg():
+    """the gui reads the game from the variables in cfg, so they are kept
+in line with cfg.gameState after every move"""
 
-    if abs(row2 - row1) > 2:
-        #the player should never be able to move more than 2 tiles
-        #at a time
-        return invalidMoveResponse()
+    state = cfg.gameState
 
-    if dest.player != cfg.UNOCCUPIED:
-        #if the destination is already occupied
-        return invalidMoveResponse()
+    cfg.activePlayer = state.activePlayer
+    cfg.nonActivePlayer = state.nonActivePlayer
 
+    cfg.inKillChain = state.inKillChain
+    cfg.chainKiller = state.chainKiller
 
-    if cfg.inKillChain:
-        #if a player can immediately make another killing jump they
-        #have to and they can only move the same piece
-        if row1 != cfg.chainKiller[0] or col1 != cfg.chainKiller[1]:
-            #if the player has attempted to move another piece
-            #during a jump chain
-            return pleaseFinishChainResponse()
-        if abs(row2 - row1) == 1:
-            #the move has to be a killing move, a move of one
-            #space is never a killing move
-            return pleaseFinishChainResponse()
-        
+    cfg.playerPieces[cfg.PLAYER_1] = state.playerPieces[cfg.PLAYER_1]
+    cfg.playerPieces[cfg.PLAYER_2] = state.playerPieces[cfg.PLAYER_2]
 
+    cfg.obligatedPieces[state.activePlayer] = list(state.obligatedPieces)
+    cfg.obligatedPieces[state.nonActivePlayer] = []
 
-    #must make sure that the user atacks if they can.
-    #the obligated pieces are pieces that can attack
-        
-    if len(cfg.obligatedPieces[cfg.activePlayer]) != 0 and not cfg.inKillChain:
-        if(row1, col1) not in cfg.obligatedPieces[cfg.activePlayer]:
-            #the player must use a piece that can kill
-            return pleaseHandleObligatedPieces()
-        if abs(row2 - row1) == 1:
-            #a nonkilling move in invalid
-            return pleaseHandleObligatedPieces()
-            
+def makeMove(row1, col1, row2, col2):
+    """Computes whether a move is valid and if so makes the move.
+This function returns False if the move is not valid (and nothing was done)
+and True if the move was valid and an action was completed.
+row1 and col1 are for the initial tile and row2, col2 are for the
+destination tile
 
-    
+The move is checked and made by cfg.gameState, this function shows the
+result on the board. If a piece can jump another piece after a jump it has
+to immediately. The game will not allow the player to select any piece
+but this"""
 
-    #now that we have only two cases: where the move is one space
-    #or the move is a two space killing move
-        
-    if abs(row2 - row1) == 1:
-        #perform the move
-        #
-        #depress the current tile
-        chb.deselectTile()
-        chb.editTile(row2, col2, cfg.activePlayer, curr.pieceType)
-        chb.editTile(row1, col1, cfg.UNOCCUPIED, cfg.NO_PIECE)
-
-        cfg.moveSound.play()
-
-        #checks if the piece is now qualified to become a king
-        shouldIBeKing(row2, col2)
-
-
-    if abs(row2 - row1) == 2:
-        #the game has to check that the player is actually killing another
-        #piece if they make a two space jump
-        #the midTile is the tile between curr and dest
-        midTile = None
-        midRow = 0
-        midCol = 0
-        if row2 - row1 > 0:
-            midRow = row1 + 1
-        else:
-            midRow = row1 - 1
+    if cfg.activePlayer == cfg.GAME_OVER:
+        #no moves can be made during game over
+        return False
 
-        if col2 - col1 > 0:
-            midCol = col1 + 1
-        else:
-            midCol = col1 - 1
+    #unhighlights any pieces that might have been earlier highlighted
+    if len(cfg.obligatedPieces[cfg.activePlayer]) != 0:
+        unhighlightPieces()
 
-        midTile = cfg.boardTiles[midRow][midCol]
+    #a jump in a kill chain is part of the move before it
+    player = cfg.gameState.activePlayer
+    continuesMove = cfg.gameState.inKillChain
 
-        if midTile.player != cfg.nonActivePlayer:
-            #the mid piece has to of the enemy team
-                return invalidMoveResponse()
+    result = cfg.gameState.step(row1, col1, row2, col2)
 
+    if result == gameState.MUST_FINISH_CHAIN:
+        return pleaseFinishChainResponse()
 
-        #the move is valid so make the kill.
-        #depress the current tile
-        chb.deselectTile()
-        chb.editTile(row2, col2, cfg.activePlayer, curr.pieceType)
-        chb.editTile(midRow, midCol, cfg.UNOCCUPIED, cfg.NO_PIECE)
-        chb.editTile(row1, col1, cfg.UNOCCUPIED, cfg.NO_PIECE)
-        #decrement
-        cfg.playerPieces[cfg.nonActivePlayer] -= 1
+    if result == gameState.MUST_ATTACK:
+        return pleaseHandleObligatedPieces()
 
-        cfg.killSound.play()
+    if result != gameState.VALID_STEP:
+        return invalidMoveResponse()
 
-        #checks if a piece has become a king, this is important for
-        #determining if a chain kill should continue
-        shouldIBeKing(row2, col2)
+    if cfg.gameRecord != None:
+        cfg.gameRecord.recordStep(
+            player, row1, col1, row2, col2, continuesMove
+            )
 
-        if (
-            #checks if the piece can kill from the new location
-            len(
-                whereCanIKill(
-                    row2, col2, cfg.activePlayer,
-                    cfg.boardTiles[row2][col2].pieceType
-                    )
-                    
-                ) != 0
-            ):
-            #if a piece can kill after killing then a chain kill has begun
-            cfg.inKillChain = True
-            cfg.chainKiller = (row2, col2)
-        else:
-            #end the jump chain
-            cfg.inKillChain = False
-            cfg.chainKiller = None
-            
+    #depress the current tile and redraw the tiles that changed
+    chb.deselectTile()
+    chb.drawGameState(cfg.gameState, cfg.gameState.changedTiles)
 
+    if cfg.gameState.lastStepKilled:
+        soundManager.play(soundManager.KILL_SOUND)
+    else:
+        soundManager.play(soundManager.MOVE_SOUND)
 
+    playerChanged = cfg.activePlayer != cfg.gameState.activePlayer
+    copyStateToCfg()
 
     #check if the game is now over, if so then just
     #display the winner and return
-    if cfg.playerPieces[cfg.PLAYER_1] == 0:
-        declareWinner(cfg.PLAYER_2)
-        return True
-
-    if cfg.playerPieces[cfg.PLAYER_2] == 0:
-        declareWinner(cfg.PLAYER_1)
+    if cfg.gameState.isTerminal():
+        declareWinner(cfg.gameState.winner, cfg.gameState.loserResigned)
         return True
-    
-
-    #change active player. in a chain jump the player
-    #should not be changed
-    if not cfg.inKillChain:
-        if cfg.activePlayer == cfg.PLAYER_1:
-            cfg.activePlayer = cfg.PLAYER_2
-            cfg.nonActivePlayer = cfg.PLAYER_1
-        else:
-            cfg.activePlayer = cfg.PLAYER_1
-            cfg.nonActivePlayer = cfg.PLAYER_2
 
+    if playerChanged:
         chb.displayActivePlayer()
-        
 
-        
-    #looks for pieces on the board that can now attack for the active
-    #player. Remember that we have just changed active players
-    cfg.obligatedPieces[cfg.PLAYER_1] = []
-    cfg.obligatedPieces[cfg.PLAYER_2] = []
-    checkForObligatedPieces(cfg.activePlayer)
-
-
-    if len(cfg.obligatedPieces[cfg.activePlayer]) == 0:
-        #checks if the active player cannot move
-        #if there are obligated pieces then obviosly the player can move
-        
-        mustIResign(cfg.activePlayer)
-    
-        
-    
     return True
 
 
@@ -480,14 +416,94 @@ the Tile also being a button."""
         self.pieceType = pieceType
         
 
+class ModelBoard(list):
+    """a model board is a 2d list of ModelTiles that also keeps the zobrist
+key of the pieces on it, the tiles that each player has a piece on, as
+a set and as an occupancy bitmask, and the bitboards of bitboard.py as the
+list [player one pieces, player two pieces, kings], or None if the board
+can't be kept in bitboards. They are kept up to date as long as the
+tiles are only changed with setModelTile(), which makeModelMove(),
+applyModelMove() and undoModelMove() all use."""
+
+    def __init__(self, rows=()):
+        list.__init__(self, rows)
+        self.zobristKey = zobrist.boardKey(self)
+        self.pieces = findPieces(self)
+        self.occupancy = findOccupancy(self.pieces)
+
+        bitboards = bitboard.findBitboards(self)
+        if bitboards == None:
+            self.bitboards = None
+        else:
+            self.bitboards = list(bitboards)
+
+
+def findPieces(board):
+    """looks at every tile of a 2d list of Tiles or ModelTiles and returns
+a dictionary with the set of (row, col) of the pieces of each player"""
+
+    pieces = {cfg.PLAYER_1: set(), cfg.PLAYER_2: set()}
+
+    for row in range(len(board)):
+        for col, tile in enumerate(board[row]):
+            if tile.player != cfg.UNOCCUPIED:
+                pieces[tile.player].add((row, col))
+
+    return pieces
+
+def pieceIndex(board):
+    """returns the dictionary with the set of (row, col) of the pieces of
+each player on the board. ModelBoards and the game board keep theirs up to
+date, for any other board it is found by looking at every tile"""
+
+    if isinstance(board, ModelBoard):
+        return board.pieces
+
+    if board is cfg.boardTiles:
+        return cfg.boardPieces
+
+    return findPieces(board)
+
+def findOccupancy(pieces):
+    """takes in the pieces of each player as returned by pieceIndex() and
+returns a dictionary with the occupancy bitmask of each player, which has
+the tileBit() of every piece of the player set"""
+
+    occupancy = {}
+
+    for player, tiles in pieces.items():
+        mask = 0
+        for row, col in tiles:
+            mask |= tileBit(row, col)
+        occupancy[player] = mask
+
+    return occupancy
+
+def occupancyOf(board):
+    """returns the occupancy bitmasks of findOccupancy() for the board.
+ModelBoards and the game board keep theirs up to date"""
+
+    if isinstance(board, ModelBoard):
+        return board.occupancy
+
+    if board is cfg.boardTiles:
+        return cfg.boardOccupancy
+
+    return findOccupancy(pieceIndex(board))
+
+def piecesOf(player, board):
+    """returns the (row, col) of every piece of the player on the board,
+in order of row then column"""
+    return sorted(pieceIndex(board)[player])
+
+
 def produceModelBoard(board):
     """takes in a 2d list of either Tile or ModelTiles and makes a deep copy
-of this board and returns a reference to it.
+of this board and returns a reference to it as a ModelBoard.
 
-In order to use this Model Board one has to set the cfg.boardTiles variable
-to point to the new board before making a calculation. The only functions that
-can be called with the model board produced are whereCanIKill(),
-whereCanIMove() and the provided function makeModelMove(). """
+The model board can be passed as the board parameter of whereCanIKill(),
+whereCanIMove(), killPaths() and possibleMoves(). Moves are made on it with
+the provided function makeModelMove(). """
 
     modelBoard = []
 
@@ -497,7 +513,47 @@ whereCanIMove() and the provided function makeModelMove(). """
             copyTile = ModelTile(Tile.player, Tile.pieceType)
             modelBoard[row].append(copyTile)
 
-    return modelBoard
+    return ModelBoard(modelBoard)
+
+
+def setModelTile(board, row, col, player, pieceType):
+    """changes what is on a tile of a model board. If the board is a
+ModelBoard its zobrist key, pieces, occupancy and bitboards are changed to
+match"""
+
+    tile = board[row][col]
+
+    if isinstance(board, ModelBoard):
+        board.zobristKey ^= (
+            zobrist.tileKey(row, col, tile.player, tile.pieceType)
+            ^ zobrist.tileKey(row, col, player, pieceType)
+            )
+
+        bit = tileBit(row, col)
+        if tile.player != cfg.UNOCCUPIED:
+            board.pieces[tile.player].discard((row, col))
+            board.occupancy[tile.player] &= ~bit
+        if player != cfg.UNOCCUPIED:
+            board.pieces[player].add((row, col))
+            board.occupancy[player] |= bit
+
+        bitboards = board.bitboards
+        if bitboards != None:
+            squareBit = bitboard.squareBits[row][col]
+            if tile.player != cfg.UNOCCUPIED:
+                bitboards[tile.player - cfg.PLAYER_1] &= ~squareBit
+                bitboards[bitboard.KINGS] &= ~squareBit
+            if player != cfg.UNOCCUPIED:
+                if squareBit == 0:
+                    #a piece on a light tile can't be kept in bitboards
+                    board.bitboards = None
+                else:
+                    bitboards[player - cfg.PLAYER_1] |= squareBit
+                    if pieceType == cfg.CHECKER_KING:
+                        bitboards[bitboard.KINGS] |= squareBit
+
+    tile.player = player
+    tile.pieceType = pieceType
 
 
 def makeModelMove(row1, col1, row2, col2, board):
@@ -510,65 +566,92 @@ for the validity of the move asked. If a move is being requested by the
 checker computer then it is assumed that it was correctly calculated."""
 
     origin = board[row1][col1]
-    dest = board[row2][col2]
 
-    if abs(row1 - row2) == 1:
-        #simple move
-        
-        dest.player = origin.player
-        dest.pieceType = origin.pieceType
-        
-        
-        origin.player = cfg.UNOCCUPIED
-        origin.pieceType = cfg.NO_PIECE
+    #the piece moves to the destination
+    setModelTile(board, row2, col2, origin.player, origin.pieceType)
+    setModelTile(board, row1, col1, cfg.UNOCCUPIED, cfg.NO_PIECE)
 
+    if abs(row1 - row2) != 1:
+        #kill move, the piece in the middle tile is removed
+        setModelTile(
+            board, (row1 + row2) // 2, (col1 + col2) // 2,
+            cfg.UNOCCUPIED, cfg.NO_PIECE
+            )
+
+
+def applyModelMove(move, board):
+    """Applies a whole move (a list of (row, col) tuples) to a 2d list of
+ModelTile objects in place and returns an undo record that can be given to
+undoModelMove() to take the move back. A man that reaches its king row during
+the move is crowned. Like makeModelMove() the move is not checked.
+
+The undo record is the tuple (move, player, pieceType, killed, promoted)
+where player and pieceType describe the moved piece before the move, killed
+is a list of (row, col, player, pieceType) tuples for the killed pieces and
+promoted tells if the piece was crowned. Searching with undo records means
+that one board can be used for the whole search instead of a new copy of the
+board for every move that is looked at."""
+
+    origin = board[move[0][0]][move[0][1]]
+    player = origin.player
+    pieceType = origin.pieceType
+
+    if player == cfg.PLAYER_1:
+        kingRow = cfg.NUM_ROWS - 1
     else:
-        #kill move
-
-        #find middle tile
-        mid = None
-        if row1 < row2:
-            #forward movement
-            if col1 < col2:
-                #to the right
-                mid = board[row1 + 1][col1 + 1]
-            else:
-                #to the left
-                mid = board[row1 + 1][col1 - 1]
-        else:
-            #backward movement
-            if col1 < col2:
-                #to the right
-                mid = board[row1 - 1][col1 + 1]
-            else:
-                #to the left
-                mid = board[row1 - 1][col1 - 1]
+        kingRow = 0
 
-        #make kill
-        dest.player = origin.player
-        dest.pieceType = origin.pieceType
-        
-        origin.player = cfg.UNOCCUPIED
-        origin.pieceType = cfg.NO_PIECE
+    killed = []
+    promoted = False
 
-        mid.player = cfg.UNOCCUPIED
-        mid.pieceType = cfg.NO_PIECE
+    for i in range(len(move)-1):
+        #applies the move, each tile at a time
+        curr = move[i+1]
+        prev = move[i]
 
-        
+        if abs(curr[0] - prev[0]) == 2:
+            midRow = (prev[0] + curr[0]) // 2
+            midCol = (prev[1] + curr[1]) // 2
+            mid = board[midRow][midCol]
+            killed.append((midRow, midCol, mid.player, mid.pieceType))
+
+        makeModelMove(prev[0], prev[1], curr[0], curr[1], board)
+
+        if curr[0] == kingRow and pieceType != cfg.CHECKER_KING:
+            promoted = True
+
+    if promoted:
+        setModelTile(board, move[-1][0], move[-1][1], player, cfg.CHECKER_KING)
+
+    return (move, player, pieceType, killed, promoted)
+
+def undoModelMove(record, board):
+    """takes back a move made by applyModelMove() using the undo record
+that it returned. Moves have to be taken back in the reverse order that they
+were made in"""
+
+    move, player, pieceType, killed, promoted = record
+
+    #the end is cleared first as a chain of kills can end where it started
+    setModelTile(board, move[-1][0], move[-1][1], cfg.UNOCCUPIED, cfg.NO_PIECE)
+    setModelTile(board, move[0][0], move[0][1], player, pieceType)
+
+    for row, col, killedPlayer, killedPieceType in killed:
+        setModelTile(board, row, col, killedPlayer, killedPieceType)
         
 
 def killPathsAux(
-    row, col, player, piece, path, moves
+    row, col, player, piece, path, moves, board
     ):
 
     #check if the piece should now be treated as a king
-    if player == cfg.PLAYER_1 and row == 7:
+    if player == cfg.PLAYER_1 and row == cfg.NUM_ROWS - 1:
         piece = cfg.CHECKER_KING
     elif player == cfg.PLAYER_2 and row == 0:
          piece = cfg.CHECKER_KING
          
 
-    connections = whereCanIKill(row, col, player, piece)
+    connections = whereCanIKill(row, col, player, piece, board)
 
     #add myself onto the path. Now path points to a new object
     path = path + [(row, col)]
@@ -577,47 +660,41 @@ def killPathsAux(
         #this path is now a dead end, so add the finalized path to the result
         moves.append(path)
     else:
-        originalBoard = cfg.boardTiles
-        
         for tile in connections:
-            #deep copy board
-            copyBoard = produceModelBoard(originalBoard)
-            #apply kill move to copyBoard
-            makeModelMove(row, col, tile[0], tile[1], copyBoard)
-            #make boardTiles point to the copied board
-            cfg.boardTiles = copyBoard
+            #apply the kill to the board, follow the path from there and
+            #then take the kill back
+            record = applyModelMove([(row, col), tile], board)
             
-            killPathsAux(tile[0], tile[1], player, piece, path, moves)
+            killPathsAux(tile[0], tile[1], player, piece, path, moves, board)
 
-        #return original board
-        cfg.boardTiles = originalBoard
+            undoModelMove(record, board)
 
-def killPaths(row, col, player, piece=cfg.CHECKER_MAN):
+def killPaths(row, col, player, piece=cfg.CHECKER_MAN, board=None):
     """recursively searches down the board starting from the given piece
 and finds all of the different killing paths that could be taken with the
-given piece."""
+given piece. The kills are made and taken back on the board itself, so
+it is the same when this returns; if it is None the game board is used."""
 
-    moves = []
+    if board == None:
+        board = cfg.boardTiles
 
-    originalBoard = cfg.boardTiles
-    
-    #produce a deep copy of the original game board
-    copyBoard = produceModelBoard(originalBoard)
+    if cfg.useBitboards:
+        bitboards = bitboard.fromBoard(board)
+        if bitboards != None:
+            return bitboard.killPaths(
+                row, col, player, piece == cfg.CHECKER_KING, *bitboards
+                )
 
-    #temporarily swap the original board with the model
-    cfg.boardTiles = copyBoard
-
-    if len(whereCanIKill(row, col, player, piece)) != 0: 
-        killPathsAux(row, col, player, piece, [],  moves)
+    moves = []
 
-    #return the original game board
-    cfg.boardTiles = originalBoard
+    if len(whereCanIKill(row, col, player, piece, board)) != 0: 
+        killPathsAux(row, col, player, piece, [],  moves, board)
 
     return moves
 
 
 
-def possibleMoves(player):
+def possibleMoves(player, board=None):
     """returns a list of all possible moves that could be performed on the
 given board for the given player and returns a list of tuple lists (a move)
 where each tuple represents a location on the board.
@@ -626,17 +703,24 @@ The default board used is the active
 game board. Another board can be passed in in order to simulate what moves
 a player can make after another player has (hypothetically) made a move."""
 
-    moveList = []
+    if board == None:
+        board = cfg.boardTiles
 
-    board = cfg.boardTiles
+    if cfg.useBitboards:
+        bitboards = bitboard.fromBoard(board)
+        if bitboards != None:
+            return bitboard.possibleMoves(player, *bitboards)
+
+    moveList = []
+    pieces = piecesOf(player, board)
 
     #step one is to look for kill moves
-    for row in range(len(board)):
-        for col, tile in enumerate(board[row]):
-            if tile.player == player:
-                killMoves = killPaths(row, col, player, tile.pieceType)
-                for move in killMoves:
-                    moveList.append(move)
+    for row, col in pieces:
+        killMoves = killPaths(
+            row, col, player, board[row][col].pieceType, board
+            )
+        for move in killMoves:
+            moveList.append(move)
 
     if len(moveList) != 0:
         #if there are any kill moves, only return those
@@ -644,15 +728,14 @@ a player can make after another player has (hypothetically) made a move."""
     
 
     #since there are no kill moves available now look for simple one space jumps
-    for row in range(len(board)):
-        for col, tile in enumerate(board[row]):
-
-            if tile.player == player:
-                result = whereCanIMove(row, col, player, tile.pieceType)
-                
-                for coords in result:
-                    #the original location + the destination
-                    moveList.append([(row, col)] + [coords])
+    for row, col in pieces:
+        result = whereCanIMove(
+            row, col, player, board[row][col].pieceType, board
+            )
+
+        for coords in result:
+            #the original location + the destination
+            moveList.append([(row, col)] + [coords])
                 
 
     return moveList
@@ -737,178 +820,99 @@ the oponent player's moves."""
             #if the piece will become a king, the move is worth one point
             rankedMove[1] = 1
         else:
-            #checks if the move is aimed at at least one enemy piece
-
-            #set the bounds of where we will be checking on the board
-            if move[1][0] > move[0][0]:
-                #if the movement goes up a row
-                rowStart = move[1][0]
-                rowStop = cfg.NUM_ROWS
-            else:
-                #the piece is moving down a row
-                rowStart = 0
-                rowStop = move[0][0]
-
-            if move[1][1] > move[0][1]:
-                #if the movement goes up a column
-                colStart = move[1][1]
-                colStop = cfg.NUM_COLS
-            else:
-                #the piece is moving down a column
-                colStart = 0
-                colStop = move[0][1]
-            
-            for row in range(rowStart, rowStop):
-                for col in range(colStart, colStop):
-                    tile = board[row][col]
-
-                    if (
-                        tile.player != cfg.UNOCCUPIED
-                        and tile.player != currPiece.player
-                        ):
-                        #if the piece belongs to the enemy, then reward
-                        #the points
-                        rankedMove[1] = .5
+            #checks if the move is aimed at at least one enemy piece,
+            #that is if the enemy has a piece in the part of the board
+            #between the tile the piece lands on and the edges of the board
+            #that the move goes towards
+            goesUp = move[1][0] > move[0][0]
+            goesRight = move[1][1] > move[0][1]
+            landRow, landCol = move[1]
+            quadrant = quadrantMasks[(goesUp, goesRight)][landRow][landCol]
+
+            enemy = gameState.otherPlayer(currPiece.player)
+
+            if (occupancyOf(board)[enemy] & quadrant) != 0:
+                #if a piece there belongs to the enemy, then reward
+                #the points
+                rankedMove[1] = .5
                     
         
     return rankedMove
 
-def computeComputerMove():
-    """Analyzes the board and computes the ideal move based on the computer's
-difficulty.
+def chooseComputerMove(state, playerType, depth=cfg.DEFAULT_SEARCH_DEPTH,
+                       timeLimit=None):
+    """Analyzes a GameState and returns the ideal move for its active player
+based on the computer's difficulty (playerType). Nothing is changed, so this
+can be used without the gui.
 
 The dumb computer player just gathers a list of all the possible moves
-and picks a random one to use. The smart computer player performs a more
-complicated assesment in which it applies each move to a model checker
-board and determines which move will produce the most kills and the least
-deaths and chooses a random move out of the equally best moves."""
-    
-    moves = possibleMoves(cfg.activePlayer)
-
-    if cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_DUMB:
+and picks a random one to use. The smart computer player searches depth
+moves ahead with checkerSearch and chooses a random move out of the equally
+best moves, unless the position is in the opening book or the endgame
+tablebase. If timeLimit is given the smart player searches deeper and
+deeper until that many seconds have passed, but no deeper than depth.
+Returns None if the search was stopped because the program is closing."""
+
+    if playerType == cfg.PLAYER_CPU_DUMB:
         #the dumb player should just pick a random move right away
         
         #choose a random move
-        random.seed(a=None, version=2)
-        move = random.choice(moves)
+        return cfg.rng.choice(state.legalMoves())
 
-        if makeComputerMove(move) == False:
-            #makes move; if there is an error, stop the game
-            cfg.activePlayer = cfg.GAME_OVER
-            
-        #if the dumb player has made its move, then stop
-        return
-
-
-    ##now the calculations for the smart player
+    #the opening moves are looked up instead of searched
+    move = openingBook.chooseBookMove(state)
+    if move != None:
+        return move
 
-    #a list of lists in the form of [move, score of move]
-    #where each kill adds 1 to the moves score and each death removes 1 from it
-    rankedMoves = []
-    
-    for move in moves:
-        
-        #calculate the initial value of the move
-        rankedMove = rankMove(move, cfg.boardTiles)
+    #so are the moves with only a few pieces left
+    move = endgameTablebase.chooseTablebaseMove(state)
+    if move != None:
+        return move
 
-        #now apply the move to a copy of the board to see how many kills
-        #the enemy can get, each kill for the enemy removes a point
-        #from the move's ranking
-        
-        
-        #apply each move to a copy of the board
-        originalBoard = cfg.boardTiles
-        modelBoard = produceModelBoard(originalBoard)
+    return checkerSearch.chooseSearchMove(state, depth, timeLimit)
 
-        #apply move to model board
-        for i in range(len(move)-1):
-            #applies the move, each tile at a time
-            curr = move[i+1]
-            prev = move[i]
-            makeModelMove(prev[0], prev[1], curr[0], curr[1], modelBoard)
-
-        #replace the board variable with the model board for the
-        #neccessary calculations
-        cfg.boardTiles = modelBoard
-
-
-        #generate all the possible moves for the enemy player on the new
-        #model board we have generated
-        enemyMoves = possibleMoves(cfg.nonActivePlayer)
-        
-
-        #we need to find the most deadly move that the enemy can make
-        #and use that as our baseline for how good our own move is
-        mostDamagingMoveRank = 0
-        
-        for enemyMove in enemyMoves:
-            
-            #first give the enemy move a ranking based on the number of kills
-            #it can make
-            rankedEnemyMove = rankMove(enemyMove)
-            
-            if rankedEnemyMove[1] == 0:
-                #if the rank of the current move is 0 then the move is not a
-                #kill and we can assume that all the moves will have
-                #a score of zero (no kills) as none of the possible enemy moves
-                #can be kills
-                mostDamagingMoveRank = 0
-                break
-
-            #see if the move is more damaging than the last
-            if rankedEnemyMove[1] > mostDamagingMoveRank:
-                mostDamagingMoveRank = rankedEnemyMove[1]
-
-
-        #subtract our computer move's score from the most damaging move that
-        #the enemy can make after we have made our theoretical move
-        rankedMove[1] -= mostDamagingMoveRank
-            
+def computeComputerMove():
+    """computes the move of the active computer player with
+chooseComputerMove() and makes it on the game board.
 
-        #add the ranked move to the main list
-        rankedMoves.append(rankedMove)
+When the smart player searches against the clock it thinks for the delay
+time instead of sleeping for it, so the move is made when the delay is up
+no matter how hard the position was"""
 
+    timeLimit = None
+    if (
+        cfg.searchMode == cfg.SEARCH_TIMED
+        and cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_SMART
+        ):
+        timeLimit = max(cfg.delayTime, cfg.MIN_THINK_TIME)
 
-        #bring back the old board
-        cfg.boardTiles = originalBoard
-    
+    startTime = time.perf_counter()
 
-    #now we have a list of rankedMoves to choose from
-    #we will gather the highest ranking of these moves and choose one of
-    #them to excecute at random
-
-    ##debug
-    #print()
-    #print("here are the ranked moves:")
-    #print(rankedMoves)
-    ##
-
-    bestMoves = []
-    #find the best (highest scoring) moves
-    for rankedMove in rankedMoves:
-        if len(bestMoves) == 0:
-            bestMoves.append(rankedMove)
-        else:
-            if rankedMove[1] > bestMoves[0][1]:
-                #if the new move has a higher rank, then dump
-                #the old best moves and append the new move
-                bestMoves = []
-                bestMoves.append(rankedMove)
-            elif rankedMove[1] == bestMoves[0][1]:
-                bestMoves.append(rankedMove)
+    move = chooseComputerMove(
+        cfg.gameState, cfg.playerType[cfg.activePlayer],
+        cfg.searchDepth[cfg.activePlayer], timeLimit
+        )
+    if move == None:
+        #the program is closing
+        return
 
-    
-    ##debug
-    #print("here are the best moves:")
-    #print(bestMoves)
-    #print()
-    ##
-    
-    #choose a random best move and make it
-    random.seed(a=None, version=2)
-    move = random.choice(bestMoves)
-    #we only want the move itself, not the ranking here
-    move = move[0]
+    if timeLimit != None:
+        #wait out the rest of the delay if the search finished early. The
+        #wait ends early if the game is ended or the program is closing,
+        #then the move isn't made
+        timeLeft = cfg.delayTime - (time.perf_counter() - startTime)
+        if timeLeft > 0:
+            with cfg.threadCondition:
+                cfg.threadCondition.wait_for(
+                    lambda: cfg.threadMode == cfg.THREAD_EXIT_GAME
+                    or cfg.threadMode == cfg.THREAD_SHUT_DOWN,
+                    timeLeft
+                    )
+            if (
+                cfg.threadMode == cfg.THREAD_EXIT_GAME
+                or cfg.threadMode == cfg.THREAD_SHUT_DOWN
+                ):
+                return
 
     if makeComputerMove(move) == False:
         #makes move; if there is an error, stop the game
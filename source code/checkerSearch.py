@@ -0,0 +1,385 @@
+"""This file has the search that the smart computer player uses to pick
+its moves.
+
+It is a negamax search with alpha-beta pruning: every move of the player is
+made on a model board, every answer of the enemy is made after it and so on
+until the search is depth moves deep, where the board is scored by
+evaluate(). Branches that can not change the result are cut off, which is
+what lets the search look many moves ahead.
+
+The search can also be run against the clock with iterativeDeepening(),
+which searches one move deep, then two, and so on until the time is up.
+
+What the search finds out about each position is kept in a
+transposition table, so a position that is reached again through a
+different order of moves does not have to be searched again."""
+
+import time
+
+import cfg
+import checkerLogic
+import parallelSearch
+import transpositionTable
+import zobrist
+
+
+#scores are always from the point of view of the player to move
+MAN_VALUE = 100
+KING_VALUE = 150
+
+#a man is worth a little more for every row that it has moved forward
+ADVANCE_VALUE = 2
+
+#the score of a won game. It is much larger than any material score
+WIN_SCORE = 100000
+
+#no search goes this many moves deep, so a score within MAX_PLY of
+#WIN_SCORE is a won or lost game
+MAX_PLY = 1000
+
+#set by stopSearches() when the program is closing
+stopRequested = False
+
+
+def otherPlayer(player):
+    if player == cfg.PLAYER_1:
+        return cfg.PLAYER_2
+    return cfg.PLAYER_1
+
+def isKillMove(move):
+    return abs(move[0][0] - move[1][0]) == 2
+
+
+def evaluate(board, player):
+    """scores the board for the player by counting the material of both
+players. Kings are worth more than men and men are worth more the closer
+they are to becoming kings"""
+
+    score = 0
+    pieces = checkerLogic.pieceIndex(board)
+
+    for owner in (cfg.PLAYER_1, cfg.PLAYER_2):
+        for row, col in pieces[owner]:
+            if board[row][col].pieceType == cfg.CHECKER_KING:
+                value = KING_VALUE
+            elif owner == cfg.PLAYER_1:
+                value = MAN_VALUE + ADVANCE_VALUE * row
+            else:
+                value = MAN_VALUE + ADVANCE_VALUE * (cfg.NUM_ROWS - 1 - row)
+
+            if owner == player:
+                score += value
+            else:
+                score -= value
+
+    return score
+
+
+def orderMoves(moves, board):
+    """sorts the moves so that the ones that rankMove() likes best are
+searched first, which lets alpha-beta cut off more of the search"""
+
+    if len(moves) < 2:
+        return moves
+
+    if isKillMove(moves[0]):
+        #longer chains of kills first
+        return sorted(moves, key=len, reverse=True)
+
+    return sorted(
+        moves, key=lambda move: checkerLogic.rankMove(move, board)[1],
+        reverse=True
+        )
+
+
+def stopSearches():
+    """makes every search that is running stop as if its deadline had
+passed, and every search started later stop right away"""
+
+    global stopRequested
+    stopRequested = True
+
+def isStopped(deadline):
+    """True if the search has to stop, because the deadline passed or
+stopSearches() was called"""
+    return stopRequested or (
+        deadline != None and time.perf_counter() > deadline
+        )
+
+
+def isWinScore(score):
+    """True if the score is a won or lost game rather than a material
+score"""
+    return abs(score) >= WIN_SCORE - MAX_PLY
+
+def scoreToTable(score, ply):
+    """a won or lost game is scored by how many moves it is from the start
+of the search, but the same position can be reached at any ply. Before a
+score is stored in the transposition table it is made to count the moves
+from the position itself instead"""
+
+    if score >= WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -WIN_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+def scoreFromTable(score, ply):
+    """the reverse of scoreToTable(), for a position ply moves from the
+start of the search"""
+
+    if score >= WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -WIN_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def getTranspositionTable():
+    """returns the transposition table that the smart player keeps between
+its moves, making it the first time it is asked for. Returns None if
+cfg.transpositionTableMB is 0.
+
+When the search runs in more than one process the table is made in shared
+memory, so that all of the processes use it"""
+
+    if cfg.transpositionTable == None and cfg.transpositionTableMB > 0:
+        if cfg.searchWorkers > 1:
+            cfg.transpositionTable = (
+                transpositionTable.SharedTranspositionTable(
+                    cfg.transpositionTableMB
+                    )
+                )
+        else:
+            cfg.transpositionTable = transpositionTable.TranspositionTable(
+                cfg.transpositionTableMB
+                )
+
+    return cfg.transpositionTable
+
+def closeTranspositionTable():
+    """frees the transposition table. A table in shared memory has to be
+closed before the program exits"""
+
+    if cfg.transpositionTable != None:
+        cfg.transpositionTable.close()
+        cfg.transpositionTable = None
+
+
+def negamax(board, player, depth, alpha, beta, deadline=None, table=None,
+            ply=0):
+    """returns the score of the board for the player that is to move,
+looking depth moves ahead. Only scores between alpha and beta are exact;
+a score at or below alpha means the position is no better than alpha and a
+score at or above beta means it is at least beta.
+
+When the search runs out of depth while the player has a kill available
+it keeps searching the kills, as they are forced and would change the
+material count right after the position was scored.
+
+If deadline (a time.perf_counter() time) passes, the search stops right
+away and the score it returns means nothing. The caller has to check
+isStopped() and throw the result away.
+
+table is a TranspositionTable to look positions up in and store them in,
+the board has to be a ModelBoard for it to be used. ply is how many moves
+the board is from the start of the search"""
+
+    if isStopped(deadline):
+        return 0
+
+    key = None
+    tableMove = transpositionTable.NO_MOVE
+
+    if table != None and depth > 0:
+        key = zobrist.positionKey(board.zobristKey, player)
+        entry = table.probe(key)
+
+        if entry != None:
+            entryDepth, entryScore, bound, tableMove = entry
+            entryScore = scoreFromTable(entryScore, ply)
+
+            if entryDepth >= depth and (
+                bound == transpositionTable.EXACT
+                or (bound == transpositionTable.LOWER_BOUND
+                    and entryScore >= beta)
+                or (bound == transpositionTable.UPPER_BOUND
+                    and entryScore <= alpha)
+                ):
+                #this position has already been searched deep enough
+                return entryScore
+
+    moves = checkerLogic.possibleMoves(player, board)
+
+    if len(moves) == 0:
+        #a player that can't move has lost. Losing later is better than
+        #losing sooner, so losses further from the start are scored higher
+        return -WIN_SCORE + ply
+
+    if depth <= 0 and not isKillMove(moves[0]):
+        return evaluate(board, player)
+
+    enemy = otherPlayer(player)
+    originalAlpha = alpha
+    bestScore = -WIN_SCORE * 2
+    bestMove = None
+
+    orderedMoves = orderMoves(moves, board)
+    if tableMove < len(moves):
+        #the best move the last time this position was searched is
+        #likely to still be the best
+        first = moves[tableMove]
+        orderedMoves = [first] + [move for move in orderedMoves
+                                  if move is not first]
+
+    for move in orderedMoves:
+        record = checkerLogic.applyModelMove(move, board)
+        score = -negamax(
+            board, enemy, depth - 1, -beta, -alpha, deadline, table, ply + 1
+            )
+        checkerLogic.undoModelMove(record, board)
+
+        if score > bestScore:
+            bestScore = score
+            bestMove = move
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            #the enemy would never allow this position, stop looking
+            break
+
+    if key != None and not isStopped(deadline):
+        if bestScore <= originalAlpha:
+            bound = transpositionTable.UPPER_BOUND
+        elif bestScore >= beta:
+            bound = transpositionTable.LOWER_BOUND
+        else:
+            bound = transpositionTable.EXACT
+
+        table.store(
+            key, depth, scoreToTable(bestScore, ply), bound,
+            moves.index(bestMove)
+            )
+
+    return bestScore
+
+
+def searchMoveList(board, player, moves, depth, deadline=None, table=None):
+    """searches the moves of the player on the board depth moves deep, in
+the order they are given, and returns the list of the moves with the best
+score along with that score. The board is the same when this returns.
+
+Each move is searched with a window just under the best score so far, so
+a move that ties the best is scored exactly and can be chosen as well.
+None is returned if the deadline passed or stopSearches() was called before
+the search was done"""
+
+    enemy = otherPlayer(player)
+
+    bestMoves = []
+    bestScore = -WIN_SCORE * 2
+
+    for move in moves:
+        record = checkerLogic.applyModelMove(move, board)
+        score = -negamax(
+            board, enemy, depth - 1, -WIN_SCORE * 2, -(bestScore - 1),
+            deadline, table, 1
+            )
+        checkerLogic.undoModelMove(record, board)
+
+        if isStopped(deadline):
+            return None
+
+        if score > bestScore:
+            bestScore = score
+            bestMoves = [move]
+        elif score == bestScore:
+            bestMoves.append(move)
+
+    return bestMoves, bestScore
+
+def searchMoves(state, depth, deadline=None, firstMoves=[], table=None):
+    """searches every legal move of the active player of a GameState
+depth moves deep and returns the list of the moves with the best score
+along with that score, see searchMoveList().
+
+The moves in firstMoves are searched before the others. None is returned
+if the deadline passed before the search was done. table is the
+TranspositionTable to use, if any.
+
+With cfg.searchWorkers above 1 the moves are shared out between that many
+processes, see parallelSearch.py"""
+
+    moves = state.legalMoves()
+    board = checkerLogic.produceModelBoard(state.board)
+
+    moves = orderMoves(moves, board)
+    moves.sort(key=lambda move: move not in firstMoves)
+
+    if cfg.searchWorkers > 1 and len(moves) > 1:
+        result = parallelSearch.searchMoves(
+            board, state.activePlayer, moves, depth, deadline
+            )
+        if result != parallelSearch.CANT_SEARCH:
+            return result
+
+    return searchMoveList(
+        board, state.activePlayer, moves, depth, deadline, table
+        )
+
+
+def iterativeDeepening(state, maxDepth, timeLimit, table=None):
+    """searches the moves of a GameState one move deep, then two moves deep
+and so on up to maxDepth, until timeLimit seconds have passed. Returns the
+best moves and score of the deepest search that was finished, or None if
+stopSearches() was called before the first one finished.
+
+The first search is always finished, however long it takes. Each search
+starts with the best moves of the one before, which makes the pruning work
+much better than searching that deep right away would"""
+
+    deadline = time.perf_counter() + timeLimit
+
+    result = searchMoves(state, 1, table=table)
+    if result == None:
+        #the search was stopped
+        return None
+    bestMoves, bestScore = result
+
+    if len(state.legalMoves()) == 1:
+        #there is nothing to think about
+        return bestMoves, bestScore
+
+    for depth in range(2, maxDepth + 1):
+        if isWinScore(bestScore):
+            #the end of the game has been found, looking deeper won't
+            #change the result
+            break
+
+        result = searchMoves(state, depth, deadline, bestMoves, table)
+        if result == None:
+            #the time ran out, use the last search that finished
+            break
+
+        bestMoves, bestScore = result
+
+    return bestMoves, bestScore
+
+
+def chooseSearchMove(state, depth, timeLimit=None):
+    """returns the move that the smart computer player makes in the given
+GameState, a random one of the equally best moves found by the search.
+If timeLimit is given the search is iterative and goes no deeper than
+depth. Returns None if the search was stopped with stopSearches()"""
+
+    table = getTranspositionTable()
+
+    if timeLimit == None:
+        result = searchMoves(state, depth, table=table)
+    else:
+        result = iterativeDeepening(state, depth, timeLimit, table)
+
+    if result == None:
+        return None
+    bestMoves, bestScore = result
+    return cfg.rng.choice(bestMoves)
@@ -1,15 +1,16 @@
 """This is code to create and maintain a checker board."""
 
-import random
-import time
+import queue
 import threading
 
 import tkinter as tk
 import tkinter.messagebox
-from pygame import mixer
-
 import cfg
 import checkerLogic
+import checkerSearch
+import gameRecord
+import parallelSearch
+import soundManager
 
 
 __author__ = "Matthew Dolinka"
@@ -36,7 +37,7 @@ def select(row, col):
         tile.config(relief=cfg.SELECTED_RELIEF)
 
         #play sound file
-        cfg.pressButtonSound.play()
+        soundManager.play(soundManager.PRESS_BUTTON_SOUND)
 
     elif cfg.lastSelectedItem == None and cfg.boardIsBeingCustomized:
         #a click on any spot on the board while the board is being customized
@@ -48,7 +49,7 @@ def select(row, col):
 
         if(
             pieceSelection == cfg.CHECKER_MAN
-            and ((row == 7 and playerSelection == cfg.PLAYER_1)
+            and ((row == cfg.NUM_ROWS - 1 and playerSelection == cfg.PLAYER_1)
             or (row == 0 and playerSelection == cfg.PLAYER_2))
            ):
             #the player should not be able to place a man in a spot
@@ -60,7 +61,7 @@ def select(row, col):
             errorMessage = "INVALID: you can't put a man on the wrong side"
             errorMessage += " of the board"
             updateDisplay2(errorMessage)
-            cfg.errorSound.play()
+            soundManager.play(soundManager.ERROR_SOUND)
             
             return
 
@@ -86,7 +87,7 @@ def select(row, col):
                 )
 
         #sound effect for placing down a custom piece
-        cfg.killSound.play()
+        soundManager.play(soundManager.KILL_SOUND)
         #important to deselect the tile so we will come here again
         deselectTile()
         
@@ -103,7 +104,7 @@ def select(row, col):
 
         #this will ensure that the thread does not run during the move
         #making process
-        cfg.threadMode = cfg.THREAD_NO_ACTION
+        setThreadMode(cfg.THREAD_NO_ACTION)
 
         cfg.logicFile.makeMove(
             cfg.lastSelectedItem[0], cfg.lastSelectedItem[1],
@@ -111,12 +112,12 @@ def select(row, col):
             )
 
         #the move is over and the thread can now run
-        cfg.threadMode = cfg.THREAD_MAKE_MOVE
+        setThreadMode(cfg.THREAD_MAKE_MOVE)
     
     elif cfg.lastSelectedItem == (row, col):
         deselectTile()
         #play sound file
-        cfg.depressButtonSound.play()
+        soundManager.play(soundManager.DEPRESS_BUTTON_SOUND)
 
 def deselectTile():
     """simply unselects a tile. Used in making a move"""
@@ -124,7 +125,7 @@ def deselectTile():
         target = cfg.boardTiles[cfg.lastSelectedItem[0]][cfg.lastSelectedItem[1]]
     
         cfg.lastSelectedItem = None
-        target.config(relief=cfg.UNSELECTED_RELIEF)
+        configWidget(target, relief=cfg.UNSELECTED_RELIEF)
         
     updateDisplay2(cfg.DEFAULT_DISPLAY_2_TEXT)
         
@@ -147,14 +148,40 @@ def editTile(row, col, player, pieceType):
             updateDisplay1("error editing tile")
             return
 
+        #keep the index of the pieces on the board up to date
+        bit = checkerLogic.tileBit(row, col)
+        for owner in (cfg.PLAYER_1, cfg.PLAYER_2):
+            cfg.boardPieces[owner].discard((row, col))
+            cfg.boardOccupancy[owner] &= ~bit
+        if player != cfg.UNOCCUPIED:
+            cfg.boardPieces[player].add((row, col))
+            cfg.boardOccupancy[player] |= bit
+
         if pieceType == cfg.CHECKER_KING:
-            currTile.config(text="king")
+            text = "king"
         else:
-            currTile.config(text="")
+            text = ""
 
         currTile.pieceType = pieceType
             
-        currTile.config(bg=color)
+        configWidget(currTile, text=text, bg=color)
+        
+
+def drawGameState(state, tiles=None):
+    """makes the board show the pieces of a GameState. tiles is a list
+of the (row, col) tiles that should be redrawn, if it is None then every
+tile is redrawn"""
+
+    if tiles == None:
+        tiles = [
+            (row, col)
+            for row in range(len(state.board))
+            for col in range(len(state.board[row]))
+            ]
+
+    for row, col in tiles:
+        modelTile = state.board[row][col]
+        editTile(row, col, modelTile.player, modelTile.pieceType)
         
 
 
@@ -173,6 +200,112 @@ of the peice is saved if it needs to be reset"""
         self.defaultColor = color
         
 
+class CanvasTile():
+    """a tile drawn on a CanvasBoard. It has the same player, pieceType and
+defaultColor variables as a Tile and its config() takes the bg, text and
+relief options that are used on a Tile, so the rest of the game can use
+either one.
+
+A bg that is not the default color is drawn as a piece of that color on
+the tile and the relief is drawn as the outline of the tile. Only the
+canvas items whose options really changed are updated"""
+
+    def __init__(self, canvas, row, col, color):
+        self.player = cfg.UNOCCUPIED
+        self.pieceType = cfg.NO_PIECE
+        self.defaultColor = color
+
+        self.canvas = canvas
+
+        #the canvas has y=0 at the top, the board has row 0 at the bottom
+        left = col * cfg.CANVAS_TILE_SIZE
+        top = (cfg.NUM_ROWS - 1 - row) * cfg.CANVAS_TILE_SIZE
+        right = left + cfg.CANVAS_TILE_SIZE
+        bottom = top + cfg.CANVAS_TILE_SIZE
+        margin = cfg.CANVAS_PIECE_MARGIN
+
+        self.square = canvas.create_rectangle(
+            left, top, right, bottom, fill=color, width=0
+            )
+        self.piece = canvas.create_oval(
+            left + margin, top + margin, right - margin, bottom - margin,
+            fill=color, width=0, state=tk.HIDDEN
+            )
+        self.text = canvas.create_text(
+            (left + right) // 2, (top + bottom) // 2, text=""
+            )
+
+        #what was last drawn, so that nothing is drawn twice
+        self.options = {
+            "bg": color, "text": "", "relief": cfg.UNSELECTED_RELIEF
+            }
+
+    def config(self, **options):
+        for option, value in options.items():
+            if self.options.get(option) == value:
+                continue
+            self.options[option] = value
+
+            if option == "bg":
+                if value == self.defaultColor:
+                    self.canvas.itemconfig(self.piece, state=tk.HIDDEN)
+                else:
+                    self.canvas.itemconfig(
+                        self.piece, fill=value, state=tk.NORMAL
+                        )
+
+            elif option == "text":
+                self.canvas.itemconfig(self.text, text=value)
+
+            elif option == "relief":
+                if value == cfg.SELECTED_RELIEF:
+                    self.canvas.itemconfig(
+                        self.square, outline=cfg.CANVAS_SELECTED_COLOR,
+                        width=cfg.CANVAS_SELECTED_WIDTH
+                        )
+                else:
+                    self.canvas.itemconfig(self.square, width=0)
+
+    configure = config
+
+
+class CanvasBoard(tk.Canvas):
+    """the whole board drawn on one canvas. tiles is a 2d list of
+CanvasTiles indexed with [row][col], the same way as cfg.boardTiles"""
+
+    def __init__(self, parent):
+        tk.Canvas.__init__(
+            self, parent,
+            width=cfg.NUM_COLS * cfg.CANVAS_TILE_SIZE,
+            height=cfg.NUM_ROWS * cfg.CANVAS_TILE_SIZE,
+            highlightthickness=0
+            )
+
+        self.tiles = []
+
+        for row in range(cfg.NUM_ROWS):
+            self.tiles.append([])
+            for col in range(cfg.NUM_COLS):
+                #the same colors that the TileFrames give their tiles
+                if (cfg.NUM_ROWS - 1 - row + col) % 2 == 0:
+                    color = cfg.COLOR_1
+                else:
+                    color = cfg.COLOR_2
+
+                self.tiles[row].append(CanvasTile(self, row, col, color))
+
+        self.bind("<Button-1>", self.click)
+
+    def click(self, event):
+        """finds the tile that was clicked on and selects it"""
+
+        col = event.x // cfg.CANVAS_TILE_SIZE
+        row = cfg.NUM_ROWS - 1 - event.y // cfg.CANVAS_TILE_SIZE
+
+        if 0 <= row < cfg.NUM_ROWS and 0 <= col < cfg.NUM_COLS:
+            select(row, col)
+
+
 class TileFrame(tk.Frame):
 
     def __init__(self, parent=None, isColor1=True, numTiles=0, fillMe=[],
@@ -217,31 +350,47 @@ def endGame():
     
     cfg.delayTime = cfg.DEFAULT_DELAY
 
+    cfg.searchDepth[cfg.PLAYER_1] = cfg.DEFAULT_SEARCH_DEPTH
+    cfg.searchDepth[cfg.PLAYER_2] = cfg.DEFAULT_SEARCH_DEPTH
+    cfg.searchMode = cfg.DEFAULT_SEARCH_MODE
+
     cfg.playerPieces[cfg.PLAYER_1] = 0
     cfg.playerPieces[cfg.PLAYER_2] = 0
 
     cfg.obligatedPieces[cfg.PLAYER_1] = []
     cfg.obligatedPieces[cfg.PLAYER_2] = []
 
+    cfg.inKillChain = False
+    cfg.chainKiller = None
+
+    #a game that was stopped before it ended is recorded as unfinished
+    if cfg.gameRecord != None:
+        cfg.gameRecord.endGame(gameRecord.UNFINISHED)
+
     cfg.logicFile = None
+    cfg.gameState = None
+
+    #what was learned about the positions of this game is forgotten, for
+    #every search process
+    if cfg.transpositionTable != None:
+        cfg.transpositionTable.clear()
 
     updateDisplay1(cfg.DEFAULT_DISPLAY_1_TEXT)
     
-    cfg.root.title(cfg.DEFAULT_ROOT_TITLE_TEXT)
+    callOnMainThread(cfg.root.title, cfg.DEFAULT_ROOT_TITLE_TEXT)
     
-    cfg.root.gameButton.config(
+    configWidget(
+        cfg.root.gameButton,
         text=cfg.START_GAME_BUTTON_TEXT,
         command=cfg.root.askGameInfo
         )
     
-    #clear the tiles on the board to default settings
-    for row in range(len(cfg.boardTiles)):
-        for tile in cfg.boardTiles[row]:
-            tile.player = cfg.UNOCCUPIED
-            tile.pieceType = cfg.NO_PIECE
-
-            tile.config(text="", bg=tile.defaultColor,
-                        relief=cfg.UNSELECTED_RELIEF)
+    #clear the pieces off the board. Only tiles with pieces on them are
+    #ever highlighted and the selected tile was deselected above, so the
+    #empty tiles are already in their default settings
+    for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+        for row, col in list(cfg.boardPieces[player]):
+            editTile(row, col, cfg.UNOCCUPIED, cfg.NO_PIECE)
 
 def makeThreadEndGame():
     """tells the computer player thread to end the game"""
@@ -252,12 +401,50 @@ def makeThreadEndGame():
         #if the user changes their mind don't exit
         return
     
-    cfg.threadMode = cfg.THREAD_EXIT_GAME
+    setThreadMode(cfg.THREAD_EXIT_GAME)
+
+def setThreadMode(mode):
+    """changes what the computer player thread should do and wakes it up
+so that it can check whether it has anything to do"""
+
+    with cfg.threadCondition:
+        cfg.threadMode = mode
+        cfg.threadCondition.notify_all()
+
+def shutDown():
+    """stops the computer player thread and closes the program"""
+
+    setThreadMode(cfg.THREAD_SHUT_DOWN)
+    checkerSearch.stopSearches()
+
+    #the thread may be in the middle of a move, which uses the table and
+    #writes to the record, so they are only closed once it has stopped
+    if cfg.compThread != None:
+        cfg.compThread.join(cfg.SHUT_DOWN_TIMEOUT)
+
+    parallelSearch.shutDownPool()
+    if cfg.compThread == None or not cfg.compThread.is_alive():
+        checkerSearch.closeTranspositionTable()
+        if cfg.gameRecord != None:
+            cfg.gameRecord.close()
+
+    elif cfg.transpositionTable != None:
+        #the daemon thread may still be probing the table, so it is left
+        #open for the operating system to free. The record is flushed
+        #after every jump anyway
+        cfg.transpositionTable.abandon()
+
+    cfg.root.destroy()
     
 
-def startGame(gameMode, player1Mode, player2Mode, delayTime, firstPlayer):
+def startGame(gameMode, player1Mode, player2Mode, delayTime, firstPlayer,
+              player1Depth=cfg.DEFAULT_SEARCH_DEPTH,
+              player2Depth=cfg.DEFAULT_SEARCH_DEPTH,
+              searchMode=cfg.DEFAULT_SEARCH_MODE):
     """Sets up the game. The logicFile variable points to the file that
-is being used to compute the moves"""
+is being used to compute the moves. The depths are how far ahead each
+player searches if it is a smart cpu and the search mode says whether
+that search is timed by the delay"""
 
     #the game button is repurposed to end the game when pressed
     #TELLS THE THREAD TO END THE GAME (makes the thread call the
@@ -294,6 +481,9 @@ is being used to compute the moves"""
         cfg.playerType[cfg.PLAYER_1] = player1Mode
         cfg.playerType[cfg.PLAYER_2] = player2Mode
         cfg.delayTime = delayTime
+        cfg.searchDepth[cfg.PLAYER_1] = player1Depth
+        cfg.searchDepth[cfg.PLAYER_2] = player2Depth
+        cfg.searchMode = searchMode
         
 
     #the board is set up for the selected game and difficulty
@@ -309,9 +499,8 @@ is being used to compute the moves"""
             cfg.nonActivePlayer = cfg.PLAYER_1
         
     else:
-        random.seed(a=None, version=2)
         #returns either 0 or 1
-        randomVal = random.randrange(2)
+        randomVal = cfg.rng.randrange(2)
 
         if randomVal == 0:
             cfg.activePlayer = cfg.PLAYER_1
@@ -320,6 +509,9 @@ is being used to compute the moves"""
             cfg.activePlayer = cfg.PLAYER_2
             cfg.nonActivePlayer = cfg.PLAYER_1
 
+    #the rules of the game are kept in a GameState made from the board
+    cfg.logicFile.setUpGameState()
+
     #if any tile is already selected then deselect
     if cfg.lastSelectedItem != None:
         deselectTile()
@@ -327,17 +519,78 @@ is being used to compute the moves"""
     displayActivePlayer()
 
     #allow the thread to excecute moves
-    cfg.threadMode = cfg.THREAD_MAKE_MOVE
+    setThreadMode(cfg.THREAD_MAKE_MOVE)
 
 
     
     
 
 def updateDisplay1(displayMe):
-    cfg.root.display1.config(text=displayMe)
+    configWidget(cfg.root.display1, text=displayMe)
 
 def updateDisplay2(displayMe):
-    cfg.root.display2.config(text=displayMe)
+    configWidget(cfg.root.display2, text=displayMe)
+
+
+def onMainThread():
+    return threading.current_thread() is threading.main_thread()
+
+def configWidget(widget, **options):
+    """changes the options of a tkinter widget. When this is called from
+the computer player thread the change is put in cfg.uiQueue and made by
+the main thread in drainUiQueue() instead"""
+
+    if onMainThread():
+        if not cfg.uiQueue.empty():
+            #changes that were queued before this one have to be made first
+            makeQueuedChanges()
+        widget.config(**options)
+    else:
+        cfg.uiQueue.put((cfg.UI_CONFIG, widget, options))
+
+def callOnMainThread(function, *args):
+    """calls a function that uses tkinter, like configWidget() does"""
+
+    if onMainThread():
+        if not cfg.uiQueue.empty():
+            makeQueuedChanges()
+        function(*args)
+    else:
+        cfg.uiQueue.put((cfg.UI_CALL, function, args))
+
+def makeQueuedChanges():
+    """makes every change in cfg.uiQueue. The options of each widget are
+merged so that every widget is only configured once, even if a multi jump
+changed its tile several times"""
+
+    pending = {}
+
+    while True:
+        try:
+            kind, target, args = cfg.uiQueue.get_nowait()
+        except queue.Empty:
+            break
+
+        if kind == cfg.UI_CONFIG:
+            pending.setdefault(target, {}).update(args)
+        else:
+            #the widgets are configured before the call so that everything
+            #still happens in order
+            for widget, options in pending.items():
+                widget.config(**options)
+            pending = {}
+
+            target(*args)
+
+    for widget, options in pending.items():
+        widget.config(**options)
+
+def drainUiQueue():
+    """makes the changes that the computer player thread has queued once
+every frame"""
+
+    makeQueuedChanges()
+    cfg.root.after(cfg.UI_FRAME_MS, drainUiQueue)
     
 
 def displayActivePlayer():
@@ -471,6 +724,7 @@ class StartGameWindow(tk.Toplevel):
                      ]
             )
         self.player1ChoiceFrame.var.set(cfg.PLAYER_HUMAN)
+        self.player1DepthSlider = self.addDepthSlider(self.player1ChoiceFrame)
         self.player1ChoiceFrame.pack(padx=padding, anchor=anchor)
 
         
@@ -484,7 +738,19 @@ class StartGameWindow(tk.Toplevel):
                      ]
             )
         self.player2ChoiceFrame.var.set(cfg.PLAYER_HUMAN)
+        self.player2DepthSlider = self.addDepthSlider(self.player2ChoiceFrame)
         self.player2ChoiceFrame.pack(padx=(5,0), anchor="w")
+
+        #ask if the smart cpu should think for the delay time
+        self.searchModeChoiceFrame = RadiobuttonFrame(
+            parent=self, labelText="smart cpu search:",
+            options=[
+                ("think for the delay", cfg.SEARCH_TIMED),
+                ("fixed depth", cfg.SEARCH_FIXED_DEPTH)
+                ]
+            )
+        self.searchModeChoiceFrame.var.set(cfg.DEFAULT_SEARCH_MODE)
+        self.searchModeChoiceFrame.pack(padx=padding, anchor=anchor)
         
         
         #ask who plays first
@@ -542,6 +808,23 @@ class StartGameWindow(tk.Toplevel):
         
         self.finalButton.pack(pady=(0,5))
 
+    def addDepthSlider(self, frame):
+        """puts a slider for how many moves ahead a smart cpu searches at
+the end of a player's radio buttons and returns the slider"""
+
+        label = tk.Label(frame, text="depth:")
+        label.pack(side="left", padx=(5,0))
+
+        slider = tk.Scale(
+            frame,
+            from_=cfg.MIN_SEARCH_DEPTH, to=cfg.MAX_SEARCH_DEPTH,
+            orient=tk.HORIZONTAL, length=80
+            )
+        slider.pack(side="left")
+        slider.set(cfg.DEFAULT_SEARCH_DEPTH)
+
+        return slider
+
     def customizeBoard(self):
         """either sets up the game for a custom game or starts the game as
         a standard board"""
@@ -590,7 +873,7 @@ class StartGameWindow(tk.Toplevel):
             errorMessage = "INVALID: please give every player"
             errorMessage += " at least one piece"
             updateDisplay2(errorMessage)
-            cfg.errorSound.play()
+            soundManager.play(soundManager.ERROR_SOUND)
             return
 
         #in case this window is open
@@ -603,7 +886,10 @@ class StartGameWindow(tk.Toplevel):
                 self.player1ChoiceFrame.var.get(),
                 self.player2ChoiceFrame.var.get(),
                 self.delaySlider.get(),
-                self.firstPlayerChoiceFrame.var.get()
+                self.firstPlayerChoiceFrame.var.get(),
+                self.player1DepthSlider.get(),
+                self.player2DepthSlider.get(),
+                self.searchModeChoiceFrame.var.get()
                 )
 
         
@@ -641,29 +927,36 @@ class Root(tk.Tk):
 
         #frames is where the frames for the tiles are kept
         cfg.frames = []
-        
-        isColor1 = True
-        for i in range(cfg.NUM_ROWS):
-            if i % 2 == 0:
-                isColor1 = True
-            else:
-                isColor1 = False
-                
-            tilesInFrame = []
-                
-            cfg.frames.append(
-                TileFrame(
-                    self, isColor1, cfg.NUM_COLS, tilesInFrame,
-                    cfg.NUM_ROWS - i - 1
+
+        if cfg.useCanvasBoard:
+            #the canvas already has row 0 at the bottom
+            self.canvasBoard = CanvasBoard(self)
+            self.canvasBoard.pack()
+            cfg.boardTiles.extend(self.canvasBoard.tiles)
+
+        else:
+            isColor1 = True
+            for i in range(cfg.NUM_ROWS):
+                if i % 2 == 0:
+                    isColor1 = True
+                else:
+                    isColor1 = False
+                    
+                tilesInFrame = []
+                    
+                cfg.frames.append(
+                    TileFrame(
+                        self, isColor1, cfg.NUM_COLS, tilesInFrame,
+                        cfg.NUM_ROWS - i - 1
+                        )
                     )
-                )
-            cfg.frames[i].pack()
-            cfg.boardTiles.append(tilesInFrame)
+                cfg.frames[i].pack()
+                cfg.boardTiles.append(tilesInFrame)
 
-        #the reverse is so that the grid works like a cartesian plane
-        #with y=0 at bottom
-        cfg.frames.reverse()
-        cfg.boardTiles.reverse()
+            #the reverse is so that the grid works like a cartesian plane
+            #with y=0 at bottom
+            cfg.frames.reverse()
+            cfg.boardTiles.reverse()
         
 
         #set up bottom dashboard
@@ -685,29 +978,69 @@ class Root(tk.Tk):
         
         
 
+def isComputersTurn():
+    """True if the thread is allowed to make moves and the active player is
+a computer player"""
+
+    return (
+        cfg.threadMode == cfg.THREAD_MAKE_MOVE
+        and
+        (cfg.activePlayer == cfg.PLAYER_1
+        or cfg.activePlayer == cfg.PLAYER_2)
+        and
+        (cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_DUMB
+        or cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_SMART)
+        )
+
+def threadHasWork():
+    return (
+        cfg.threadMode == cfg.THREAD_EXIT_GAME
+        or cfg.threadMode == cfg.THREAD_SHUT_DOWN
+        or isComputersTurn()
+        )
+
 def computerLoop():
-    """continually checks whether it is the computer's turn to play.
-Will sleep according to how long the user desires before calling in
-the computer move"""
+    """sleeps until it is the computer's turn to play, the game should end
+or the program is closing. Will sleep according to how long the user
+desires before calling in the computer move.
+
+The thread is woken up by setThreadMode(), which startGame(), select() and
+makeThreadEndGame() call. After a computer move it checks again right away,
+so two computer players keep playing each other"""
 
     while True:
-        
-        if (
-            cfg.threadMode == cfg.THREAD_MAKE_MOVE
-            and
-            (cfg.activePlayer == cfg.PLAYER_1
-            or cfg.activePlayer == cfg.PLAYER_2)
-            and
-            (cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_DUMB
-            or cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_SMART)
-            ):
-            time.sleep(cfg.delayTime)
-            cfg.logicFile.computeComputerMove()
 
-        if cfg.threadMode == cfg.THREAD_EXIT_GAME:
-            #the thread resets itself then calls to exit the game
-            cfg.threadMode = cfg.THREAD_NO_ACTION
+        with cfg.threadCondition:
+            cfg.threadCondition.wait_for(threadHasWork)
+            mode = cfg.threadMode
+
+            if mode == cfg.THREAD_EXIT_GAME:
+                #the thread resets itself then calls to exit the game
+                cfg.threadMode = cfg.THREAD_NO_ACTION
+
+        if mode == cfg.THREAD_SHUT_DOWN:
+            return
+
+        if mode == cfg.THREAD_EXIT_GAME:
             endGame()
+            continue
+
+        if not (
+            cfg.searchMode == cfg.SEARCH_TIMED
+            and cfg.playerType[cfg.activePlayer] == cfg.PLAYER_CPU_SMART
+            ):
+            #a smart player searching against the clock spends the
+            #delay thinking instead of sleeping. Closing the program
+            #wakes the thread up
+            with cfg.threadCondition:
+                cfg.threadCondition.wait_for(
+                    lambda: cfg.threadMode == cfg.THREAD_SHUT_DOWN,
+                    cfg.delayTime
+                    )
+            if cfg.threadMode == cfg.THREAD_SHUT_DOWN:
+                return
+
+        cfg.logicFile.computeComputerMove()
             
 
 
@@ -734,9 +1067,21 @@ def main():
     cfg.customCheckersGameWindow.withdraw()
     
 
-    #this is the thread that will make computer moves
+    #the transposition table is given its size now, before any search
+    #process is started
+    checkerSearch.getTranspositionTable()
+
+    #closing the main window stops the computer player thread as well
+    cfg.root.protocol('WM_DELETE_WINDOW', shutDown)
+
+    #the changes to the gui made by the computer player thread are made here
+    cfg.root.after(cfg.UI_FRAME_MS, drainUiQueue)
+
+    #this is the thread that will make computer moves. It is a daemon so
+    #that it can't keep the program running after the window is closed,
+    #even in the middle of a search
     cfg.threadCanRun = False
-    cfg.compThread = threading.Thread(target=computerLoop)
+    cfg.compThread = threading.Thread(target=computerLoop, daemon=True)
     cfg.threadMode = cfg.THREAD_NO_ACTION
     cfg.compThread.start()
 
@@ -0,0 +1,394 @@
+"""This file makes and reads the endgame tablebase, which knows the result
+of every position with only a few pieces left on the board.
+
+Once only a few pieces are left the search usually can't see far enough
+ahead to find a way to win, so the smart player moves its kings back and
+forth without getting anywhere. The tablebase has the result of every
+position with up to cfg.tablebasePieces pieces with perfect play: whether the player
+to move wins, loses or can't be beaten and can't win (a draw, the game
+would go on forever), and for wins and losses in how many moves. The smart
+player looks up the result after each of its moves and picks the move that
+wins the fastest, or draws, or loses the slowest.
+
+The positions are split into tables by how many men and kings each player
+has. Every table is a file with one byte for every position, with each
+player to move, found by its index. The files are read with mmap, so a
+lookup only reads the part of the file that it needs and the tables are
+never loaded into memory.
+
+The tables are made by retrograde analysis: the positions where the player
+to move has lost are found first, then the positions that win by moving to
+one of those, then the positions where every move leads to one of those and
+so on. Positions that are never reached this way are draws. A table only
+needs the tables with fewer pieces or more kings, which are made first.
+
+The tables only work on boards where the bitboard move generator works. To
+make them for up to 3 pieces:
+    python endgameTablebase.py --pieces 3"""
+
+import argparse
+import itertools
+import math
+import mmap
+import os
+import time
+
+import cfg
+import bitboard
+
+
+#the results of a position for the player to move
+WIN = 1
+LOSS = 2
+DRAW = 3
+
+#how a result is kept in one byte: 0 is a draw, 1 to 126 a win in that
+#many moves and 128 to 254 a loss in 0 to 126 moves. A loss in 0 moves
+#means the player to move can't move. 255 is for the places in a table
+#that aren't a position, like two pieces on the same square
+DRAW_BYTE = 0
+LOSS_BYTE = 128
+INVALID_BYTE = 255
+MAX_DISTANCE = 126
+
+#the tables are kept next to this file, in a folder for the board size
+TABLEBASE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), cfg.TABLEBASE_DIRECTORY,
+    "%dx%d" %(cfg.NUM_ROWS, cfg.NUM_COLS)
+    )
+
+#the open tables, by signature. None for a table that doesn't exist
+openTables = {}
+
+
+def encode(result, distance):
+    if result == WIN:
+        return min(distance, MAX_DISTANCE)
+    if result == LOSS:
+        return LOSS_BYTE + min(distance, MAX_DISTANCE)
+    return DRAW_BYTE
+
+def decode(byte):
+    """returns the (result, distance) of a byte from a table"""
+    if byte == DRAW_BYTE:
+        return DRAW, 0
+    if byte < LOSS_BYTE:
+        return WIN, byte
+    return LOSS, byte - LOSS_BYTE
+
+
+def signatureOf(p1, p2, kings):
+    """the table that a position is in: the tuple (men of player one, kings
+of player one, men of player two, kings of player two)"""
+    return (
+        bitboard.countPieces(p1 & ~kings), bitboard.countPieces(p1 & kings),
+        bitboard.countPieces(p2 & ~kings), bitboard.countPieces(p2 & kings)
+        )
+
+def tableSize(signature):
+    """the number of bytes in a table"""
+
+    size = 2
+    for count in signature:
+        size *= math.comb(bitboard.NUM_SQUARES, count)
+    return size
+
+def tableFile(signature):
+    return os.path.join(TABLEBASE_PATH, "%d%d%d%d.tb" %signature)
+
+
+def rankSquares(squares):
+    """the place of a set of squares, lowest square first, in the list of
+all the sets of that many squares"""
+    return sum(math.comb(square, i + 1) for i, square in enumerate(squares))
+
+def positionIndex(p1, p2, kings, player):
+    """the place of a position in its table"""
+
+    index = 0
+    for bits in (p1 & ~kings, p1 & kings, p2 & ~kings, p2 & kings):
+        squares = list(bitboard.squaresIn(bits))
+        index = (
+            index * math.comb(bitboard.NUM_SQUARES, len(squares))
+            + rankSquares(squares)
+            )
+
+    return index * 2 + (player - cfg.PLAYER_1)
+
+
+def signaturesUpTo(maxPieces):
+    """every table with up to maxPieces pieces where both players have a
+piece, in the order that they have to be made in: fewer pieces first and
+more kings first, since captures and crowning only lead to those tables"""
+
+    signatures = []
+    for signature in itertools.product(range(maxPieces + 1), repeat=4):
+        if (
+            sum(signature) <= maxPieces
+            and signature[0] + signature[1] > 0
+            and signature[2] + signature[3] > 0
+            ):
+            signatures.append(signature)
+
+    signatures.sort(key=lambda signature:
+                    (sum(signature), -signature[1] - signature[3]))
+    return signatures
+
+def positionsIn(signature):
+    """yields the (p1, p2, kings) of every position of a table"""
+
+    p1MenRow = bitboard.KING_ROW[cfg.PLAYER_1]
+    p2MenRow = bitboard.KING_ROW[cfg.PLAYER_2]
+
+    groups = [
+        itertools.combinations(range(bitboard.NUM_SQUARES), count)
+        for count in signature
+        ]
+
+    for p1Men, p1Kings, p2Men, p2Kings in itertools.product(
+        *[list(group) for group in groups]
+        ):
+        squares = p1Men + p1Kings + p2Men + p2Kings
+        if len(set(squares)) != len(squares):
+            continue
+
+        #a man on the row where it would be a king can't happen
+        if any(bitboard.squareCoords[square][0] == p1MenRow
+               for square in p1Men):
+            continue
+        if any(bitboard.squareCoords[square][0] == p2MenRow
+               for square in p2Men):
+            continue
+
+        p1 = p2 = kings = 0
+        for square in p1Men + p1Kings:
+            p1 |= 1 << square
+        for square in p2Men + p2Kings:
+            p2 |= 1 << square
+        for square in p1Kings + p2Kings:
+            kings |= 1 << square
+
+        yield p1, p2, kings
+
+
+def solveTable(signature, solvedTables):
+    """works out every position of a table and returns the table as a
+bytearray. solvedTables has the tables it depends on, by signature"""
+
+    size = tableSize(signature)
+    table = bytearray([INVALID_BYTE]) * size
+
+    #for every position: the number of moves whose result isn't known to
+    #be a win for the other player, the longest of those wins and whether
+    #a move leads to a draw, which means the position can't be lost
+    remaining = {}
+    longestWin = {}
+    canDraw = set()
+
+    #predecessors[index] is the positions with a move to the position
+    predecessors = {}
+
+    #buckets[distance] is the (index, result) found to be that many moves
+    #from the end of the game
+    buckets = {}
+
+    def schedule(index, result, distance):
+        buckets.setdefault(distance, []).append((index, result))
+
+    for p1, p2, kings in positionsIn(signature):
+        for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+            index = positionIndex(p1, p2, kings, player)
+            enemy = cfg.PLAYER_2 if player == cfg.PLAYER_1 else cfg.PLAYER_1
+
+            moves = bitboard.possibleMoves(player, p1, p2, kings)
+            remaining[index] = len(moves)
+            longestWin[index] = 0
+
+            if len(moves) == 0:
+                schedule(index, LOSS, 0)
+                continue
+
+            for move in moves:
+                newP1, newP2, newKings = bitboard.applyMove(
+                    move, p1, p2, kings
+                    )
+                enemyPieces = newP2 if enemy == cfg.PLAYER_2 else newP1
+
+                if enemyPieces == 0:
+                    #the last enemy piece was taken
+                    result, distance = LOSS, 0
+                else:
+                    newSignature = signatureOf(newP1, newP2, newKings)
+                    newIndex = positionIndex(newP1, newP2, newKings, enemy)
+
+                    if newSignature == signature:
+                        predecessors.setdefault(newIndex, []).append(index)
+                        continue
+
+                    result, distance = decode(
+                        solvedTables[newSignature][newIndex]
+                        )
+
+                #the result of a move is known already
+                if result == LOSS:
+                    schedule(index, WIN, distance + 1)
+                elif result == WIN:
+                    remaining[index] -= 1
+                    longestWin[index] = max(longestWin[index], distance)
+                else:
+                    canDraw.add(index)
+
+            if remaining[index] == 0 and index not in canDraw:
+                schedule(index, LOSS, longestWin[index] + 1)
+
+    #the positions are worked out closest to the end of the game first,
+    #so each one gets the shortest win or the longest loss
+    distance = 0
+    while len(buckets) != 0:
+        for index, result in buckets.pop(distance, []):
+            if table[index] != INVALID_BYTE:
+                #already found closer to the end
+                continue
+
+            table[index] = encode(result, distance)
+
+            for parent in predecessors.get(index, []):
+                if table[parent] != INVALID_BYTE:
+                    continue
+
+                if result == LOSS:
+                    schedule(parent, WIN, distance + 1)
+                else:
+                    remaining[parent] -= 1
+                    longestWin[parent] = max(longestWin[parent], distance)
+                    if remaining[parent] == 0 and parent not in canDraw:
+                        schedule(parent, LOSS, longestWin[parent] + 1)
+
+        distance += 1
+
+    #what is left can't be won or lost
+    for index in remaining:
+        if table[index] == INVALID_BYTE:
+            table[index] = DRAW_BYTE
+
+    return table
+
+
+def generate(maxPieces):
+    """makes and saves every table with up to maxPieces pieces"""
+
+    os.makedirs(TABLEBASE_PATH, exist_ok=True)
+    solvedTables = {}
+
+    for signature in signaturesUpTo(maxPieces):
+        startTime = time.perf_counter()
+        table = solveTable(signature, solvedTables)
+        solvedTables[signature] = table
+
+        with open(tableFile(signature), "wb") as outputFile:
+            outputFile.write(table)
+
+        print("%d%d%d%d: %d bytes in %.1f seconds"
+              %(signature + (len(table), time.perf_counter() - startTime)))
+
+
+def openTable(signature):
+    """returns the table with the signature mapped into memory, or None if
+it hasn't been made"""
+
+    if signature not in openTables:
+        try:
+            with open(tableFile(signature), "rb") as tableFileObject:
+                openTables[signature] = mmap.mmap(
+                    tableFileObject.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+        except (OSError, ValueError):
+            openTables[signature] = None
+
+    return openTables[signature]
+
+def probe(p1, p2, kings, player):
+    """returns the (result, distance) of a position for the player to move,
+or None if its table hasn't been made"""
+
+    if (p1 if player == cfg.PLAYER_1 else p2) == 0:
+        return LOSS, 0
+
+    table = openTable(signatureOf(p1, p2, kings))
+    if table == None:
+        return None
+
+    byte = table[positionIndex(p1, p2, kings, player)]
+    if byte == INVALID_BYTE:
+        return None
+    return decode(byte)
+
+
+def chooseTablebaseMove(state):
+    """returns the best move for the active player of a GameState according
+to the tablebase: the fastest win, a draw or the slowest loss, picking at
+random between equally good moves. Returns None if the tablebase is turned
+off, there are too many pieces or the tables haven't been made"""
+
+    if (
+        not cfg.useTablebase
+        or sum(state.playerPieces.values()) > cfg.tablebasePieces
+        ):
+        return None
+
+    bitboards = bitboard.fromBoard(state.board)
+    if bitboards == None:
+        return None
+
+    bestMoves = []
+    bestScore = None
+
+    for move in state.legalMoves():
+        newP1, newP2, newKings = bitboard.applyMove(move, *bitboards)
+        result = probe(newP1, newP2, newKings, state.nonActivePlayer)
+        if result == None:
+            return None
+
+        enemyResult, distance = result
+
+        #higher is better: fast wins, then draws, then slow losses
+        if enemyResult == LOSS:
+            score = 2 * MAX_DISTANCE - distance
+        elif enemyResult == WIN:
+            score = -2 * MAX_DISTANCE + distance
+        else:
+            score = 0
+
+        if bestScore == None or score > bestScore:
+            bestScore = score
+            bestMoves = [move]
+        elif score == bestScore:
+            bestMoves.append(move)
+
+    if len(bestMoves) == 0:
+        return None
+    return cfg.rng.choice(bestMoves)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="makes the endgame tablebase"
+        )
+    parser.add_argument(
+        "--pieces", type=int, default=cfg.DEFAULT_TABLEBASE_PIECES,
+        help="the most pieces that a position in the tablebase has"
+        " (default %d)" %cfg.DEFAULT_TABLEBASE_PIECES
+        )
+    args = parser.parse_args(args)
+
+    if cfg.NUM_COLS % 2 != 0:
+        print("the tablebase needs a board with an even number of columns")
+        return
+
+    startTime = time.perf_counter()
+    generate(args.pieces)
+    print("done in %.1f seconds" %(time.perf_counter() - startTime))
+
+
+if __name__ == "__main__":
+    main()
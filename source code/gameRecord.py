@@ -0,0 +1,431 @@
+"""This file writes the games that are played to a PDN file and reads them
+back, so that they are kept after the board is cleared.
+
+A RecordWriter appends games to a PDN file one jump at a time, as they are
+made, and flushes the file after every jump, so a game is only lost up to
+the jump that was being made if the program stops. The gui records every
+jump that makeMove() makes when cfg.recordGames is on, and selfPlay.py
+records its games with --pdn.
+
+Each game has the tags of the players, the date and, if it didn't start
+from the starting position with player one to move, the position it
+started from in the FEN tag (see positionCode.py). Then the moves follow
+with their numbers, a simple move as 11-15 and a kill as 15x24, with every
+square that a kill chain lands on, 15x24x31. The game ends with its result:
+1-0 if player one (black) won, 0-1 if player two (white) won, 1/2-1/2 for a
+draw and * if it was stopped before the end.
+
+readGames() reads the games of a PDN file one at a time, reading only as
+much of the file as the game it is on, so files of any size can be read.
+It skips comments and variations and reads moves written with only the
+first and last square of a kill as well, as other programs write them.
+replayGame() plays a game that was read to get its moves as lists of
+(row, col) tuples.
+
+Squares are numbered the same as in positionCode.py, the standard PDN
+numbering, so games can only be recorded on boards where bitboards work.
+checkKnownGame() reads a published opening, plays it and writes it back to
+check that the numbering matches other programs.
+
+Example, to check every game in a file:
+    python gameRecord.py games.pdn --replay"""
+
+import argparse
+import datetime
+import io
+import os
+import re
+
+import cfg
+import bitboard
+import gameState
+import positionCode
+
+
+#the result at the end of a game by the winner, None for a draw
+RESULTS = {cfg.PLAYER_1: "1-0", cfg.PLAYER_2: "0-1", None: "1/2-1/2"}
+UNFINISHED = "*"
+
+#the results that can end a game in a file and who they say won
+RESULT_WINNERS = {
+    "1-0": cfg.PLAYER_1, "2-0": cfg.PLAYER_1,
+    "0-1": cfg.PLAYER_2, "0-2": cfg.PLAYER_2,
+    "1/2-1/2": None, "1-1": None,
+    UNFINISHED: None
+    }
+
+#the names of the players in the tags
+PLAYER_TAGS = {cfg.PLAYER_1: "Black", cfg.PLAYER_2: "White"}
+
+#a new move starts a new line once a line is this long
+LINE_LENGTH = 72
+
+#the file that the gui records its games in, next to this file
+RECORD_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), cfg.GAME_RECORD_FILE
+    )
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"(.*)"\s*\]')
+TOKEN_PATTERN = re.compile(r'[{}()]|;.*|[^\s{}();]+')
+MOVE_NUMBER_PATTERN = re.compile(r'^\d+\.+')
+MOVE_PATTERN = re.compile(r'^(\d+)((?:[-x:]\d+)+)[!?]*$')
+
+#the start of the Single Corner opening as it is written in books, and the
+#position it ends in. With the squares of a row numbered the wrong way
+#round the second move of white isn't legal
+KNOWN_GAME = """[Event "Single Corner"]
+
+1. 11-15 22-18 2. 15x22 25x18 3. 8-11 29-25 4. 4-8 25-22 *
+"""
+KNOWN_GAME_END = (
+    "B:W18,21,22,23,24,26,27,28,30,31,32:B1,2,3,5,6,7,8,9,10,11,12"
+    )
+
+
+def playerName(playerType, depth=cfg.DEFAULT_SEARCH_DEPTH):
+    """the name of a player in the tags"""
+
+    if playerType == cfg.PLAYER_CPU_DUMB:
+        return "dumb"
+    if playerType == cfg.PLAYER_CPU_SMART:
+        return "smart:%d" %depth
+    return "human"
+
+def squareNumber(row, col):
+    return positionCode.squareToNumber(bitboard.coordsToSquare(row, col))
+
+
+class RecordWriter():
+    """appends games to a PDN file, one jump at a time"""
+
+    def __init__(self, recordFile):
+        self.file = recordFile
+
+        self.inGame = False
+        self.moveNumber = 0
+        self.lineLength = 0
+
+    def startGame(self, state, player1, player2, event="checkerboard"):
+        """writes the tags of a game that starts from a GameState. player1
+and player2 are the names of the players. Returns False if the game can't
+be recorded, then its moves are ignored"""
+
+        if self.inGame:
+            self.endGame(UNFINISHED)
+
+        position = positionCode.toText(state)
+        if position == None:
+            return False
+
+        tags = [
+            ("Event", event),
+            ("Date", datetime.date.today().strftime("%Y.%m.%d")),
+            (PLAYER_TAGS[cfg.PLAYER_1], player1),
+            (PLAYER_TAGS[cfg.PLAYER_2], player2)
+            ]
+
+        start = gameState.GameState()
+        if position != positionCode.toText(start):
+            tags.append(("FEN", position))
+
+        for name, value in tags:
+            self.file.write('[%s "%s"]\n' %(name, value))
+        self.file.write("\n")
+        self.file.flush()
+
+        self.inGame = True
+        self.moveNumber = 0
+        self.lineLength = 0
+        return True
+
+    def recordStep(self, player, row1, col1, row2, col2, continuesMove):
+        """writes one jump of the player. continuesMove is True if the jump
+is part of a kill chain that was started by the jump before it"""
+
+        if not self.inGame:
+            return
+
+        if continuesMove:
+            text = "x%d" %squareNumber(row2, col2)
+
+        else:
+            if player == cfg.PLAYER_1:
+                self.moveNumber += 1
+                text = "%d. " %self.moveNumber
+            elif self.moveNumber == 0:
+                #player two made the first move
+                self.moveNumber = 1
+                text = "1... "
+            else:
+                text = ""
+
+            separator = "x" if abs(row2 - row1) == 2 else "-"
+            text += "%d%s%d" %(
+                squareNumber(row1, col1), separator, squareNumber(row2, col2)
+                )
+
+            #moves are kept whole on one line
+            if self.lineLength >= LINE_LENGTH:
+                self.file.write("\n")
+                self.lineLength = 0
+            elif self.lineLength != 0:
+                text = " " + text
+
+        self.file.write(text)
+        self.file.flush()
+        self.lineLength += len(text)
+
+    def recordMove(self, player, move):
+        """writes a whole move, a list of (row, col) tuples"""
+
+        for i in range(len(move) - 1):
+            self.recordStep(player, *move[i], *move[i+1], i > 0)
+
+    def endGame(self, result):
+        """writes the result that ends the game, out of RESULTS or
+UNFINISHED"""
+
+        if not self.inGame:
+            return
+
+        if self.lineLength != 0:
+            self.file.write(" ")
+        self.file.write(result + "\n\n")
+        self.file.flush()
+
+        self.inGame = False
+
+    def close(self):
+        if self.inGame:
+            self.endGame(UNFINISHED)
+        self.file.close()
+
+
+def openRecord(path=RECORD_PATH):
+    """returns a RecordWriter that adds games to the end of the file at
+path, or None if the file can't be opened or the board can't be recorded"""
+
+    if cfg.NUM_COLS % 2 != 0:
+        return None
+
+    try:
+        recordFile = open(path, "a", encoding="utf-8")
+    except OSError:
+        return None
+
+    return RecordWriter(recordFile)
+
+
+class RecordedGame():
+    """a game read from a PDN file. The moves are lists of square numbers
+as they were written, the result is the one that ended the game"""
+
+    def __init__(self, tags, moves, result):
+        self.tags = tags
+        self.moves = moves
+        self.result = result
+
+    def winner(self):
+        """the player that won or None"""
+        return RESULT_WINNERS.get(self.result)
+
+
+def readGames(source):
+    """yields a RecordedGame for every game in a PDN file, read a line at a
+time. The source is the path of the file or an open text file or any other
+iterable of lines"""
+
+    if isinstance(source, str):
+        with open(source, encoding="utf-8", errors="replace") as pdnFile:
+            yield from readGames(pdnFile)
+        return
+
+    tags = {}
+    moves = []
+    inComment = False
+    variationDepth = 0
+
+    for line in source:
+        line = line.strip()
+
+        if not inComment and variationDepth == 0:
+            if line.startswith("%"):
+                #an escaped line
+                continue
+
+            match = TAG_PATTERN.match(line)
+            if match != None:
+                if len(moves) != 0:
+                    #the last game had no result
+                    yield RecordedGame(tags, moves, UNFINISHED)
+                    tags = {}
+                    moves = []
+
+                tags[match.group(1)] = match.group(2)
+                continue
+
+        for token in TOKEN_PATTERN.findall(line):
+            if inComment:
+                if token == "}":
+                    inComment = False
+                continue
+            if token == "{":
+                inComment = True
+                continue
+            if token.startswith(";"):
+                #the rest of the line is a comment
+                break
+
+            if token == "(":
+                variationDepth += 1
+                continue
+            if token == ")":
+                variationDepth = max(variationDepth - 1, 0)
+                continue
+            if variationDepth != 0:
+                continue
+
+            if token in RESULT_WINNERS:
+                yield RecordedGame(tags, moves, token)
+                tags = {}
+                moves = []
+                continue
+
+            #a move number can be written against its move, 1.11-15
+            token = MOVE_NUMBER_PATTERN.sub("", token)
+
+            match = MOVE_PATTERN.match(token)
+            if match != None:
+                moves.append([int(square) for square in
+                              re.findall(r"\d+", token)])
+
+    if len(tags) != 0 or len(moves) != 0:
+        yield RecordedGame(tags, moves, UNFINISHED)
+
+
+def startingState(game):
+    """the GameState that a recorded game starts from, or None if its FEN
+tag isn't a valid position"""
+
+    if "FEN" in game.tags:
+        return positionCode.fromText(game.tags["FEN"])
+    return gameState.GameState()
+
+def replayGame(game):
+    """plays the moves of a recorded game from its starting position and
+returns them as lists of (row, col) tuples, or None if one of them isn't
+legal. A kill written with only its first and last square is taken to be
+the first legal kill between them"""
+
+    state = startingState(game)
+    if state == None:
+        return None
+
+    moves = []
+
+    for squares in game.moves:
+        found = None
+        for move in state.legalMoves():
+            moveSquares = [squareNumber(row, col) for row, col in move]
+            if moveSquares == squares or (
+                len(squares) == 2 and moveSquares[0] == squares[0]
+                and moveSquares[-1] == squares[-1]
+                ):
+                found = move
+                break
+
+        if found == None:
+            return None
+
+        state.apply(found)
+        moves.append(found)
+
+    return moves
+
+
+def checkKnownGame():
+    """reads KNOWN_GAME, plays it and writes it again with a RecordWriter.
+Returns True if its moves are legal, it ends in KNOWN_GAME_END and the game
+that was written has the same moves"""
+
+    game = next(readGames(io.StringIO(KNOWN_GAME)))
+    moves = replayGame(game)
+    if moves == None:
+        return False
+
+    state = startingState(game)
+    for move in moves:
+        state.apply(move)
+    if positionCode.toText(state) != KNOWN_GAME_END:
+        return False
+
+    output = io.StringIO()
+    writer = RecordWriter(output)
+    writer.startGame(startingState(game), "black", "white")
+    player = cfg.PLAYER_1
+    for move in moves:
+        writer.recordMove(player, move)
+        player = cfg.PLAYER_2 if player == cfg.PLAYER_1 else cfg.PLAYER_1
+    writer.endGame(UNFINISHED)
+
+    output.seek(0)
+    written = next(readGames(output))
+    return written.moves == game.moves
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="reads the games in a PDN file and counts the results"
+        )
+    parser.add_argument("file", nargs="?", help="the PDN file to read")
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="play every game to check that its moves are legal"
+        )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="check that the squares are numbered the same as in a"
+        " published game"
+        )
+    args = parser.parse_args(args)
+
+    if args.check:
+        if checkKnownGame():
+            print("the known game was read and written correctly")
+        else:
+            print("the known game was not read and written correctly")
+
+    if args.file == None:
+        if not args.check:
+            parser.error("a file or --check is needed")
+        return
+
+    games = 0
+    moves = 0
+    wins = {cfg.PLAYER_1: 0, cfg.PLAYER_2: 0}
+    others = 0
+    illegal = 0
+
+    for game in readGames(args.file):
+        games += 1
+        moves += len(game.moves)
+
+        if game.winner() != None:
+            wins[game.winner()] += 1
+        else:
+            others += 1
+
+        if args.replay and replayGame(game) == None:
+            illegal += 1
+            print("game %d has an illegal move" %games)
+
+    print("%d games, %d moves" %(games, moves))
+    print("player one (black) wins: %d" %wins[cfg.PLAYER_1])
+    print("player two (white) wins: %d" %wins[cfg.PLAYER_2])
+    print("draws and unfinished games: %d" %others)
+    if args.replay:
+        print("games with an illegal move: %d" %illegal)
+
+
+if __name__ == "__main__":
+    main()
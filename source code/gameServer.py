@@ -0,0 +1,461 @@
+"""This file runs games of checkers for clients over the network, without
+the gui, so that many games can be played at once by one program.
+
+Every connection has one game at a time. The client sends one request per
+line, each a json object with a "command", and the server answers every
+request with one line of json:
+
+    {"command": "new", "player1": "human", "player2": "smart:5",
+     "firstPlayer": 1}
+        starts a new game. The players are "human", "dumb", "smart" or
+        "smart:DEPTH" with a depth from cfg.MIN_SEARCH_DEPTH to
+        cfg.MAX_SEARCH_DEPTH, player1 defaults to human, player2 to smart
+        and firstPlayer to 1
+    {"command": "move", "path": [[2, 2], [3, 3]]}
+        makes a move for the human player to move, one jump for every two
+        tiles that follow each other in the path, the way makeMove() makes
+        them when a player clicks the tiles. If a jump is refused the jumps
+        before it stay made
+    {"command": "state"}
+        only sends the state of the game
+    {"command": "resign"}
+        the human player to move gives up
+
+The answer is {"ok": true, "state": {...}, "computerMoves": [...]} or
+{"ok": false, "error": "...", "state": {...}} if the request was refused or
+failed. If a computer player fails to move, the moves made before it are
+in computerMoves and the game waits for the next request.
+After a new game or a move the computer players make their moves until a
+human player is to move or the game is over, and computerMoves lists them.
+The state has the board as a list of rows, row 0 first, drawn with the
+characters of perft.py, and the position in the text form of
+positionCode.py, along with the player to move, the legal moves, the
+kill chain and the winner. There is no draw rule in the game, so a game that
+goes on for more than --max-moves moves is stopped as a draw.
+
+The computer players search in a pool of processes so that the server keeps
+answering the other connections while they think. A smart player searches
+for at most --think-time seconds a move, so that no client can keep a
+process busy for long.
+
+Example:
+    python gameServer.py --port 8765 --workers 4
+loadTest.py plays many games against the server at once to measure it."""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+
+import cfg
+import checkerLogic
+import gameState
+import perft
+import positionCode
+import selfPlay
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+#how many seconds a smart player may search for each move
+DEFAULT_THINK_TIME = 2.0
+
+#the characters that the tiles of the board are drawn with
+PIECE_CHARACTERS = {
+    pieces: character for character, pieces in perft.DIAGRAM_PIECES.items()
+    }
+
+#why a jump was refused, by the result of GameState.step()
+STEP_ERRORS = {
+    gameState.INVALID_STEP: "invalid move",
+    gameState.MUST_FINISH_CHAIN: "the kill chain has to be finished",
+    gameState.MUST_ATTACK: "a piece that can kill has to kill",
+    gameState.GAME_IS_OVER: "the game is over"
+    }
+
+
+def parsePlayer(text):
+    """turns a player from a request into the tuple (playerType, search
+depth). Returns None if the player isn't valid or its depth is deeper than
+cfg.MAX_SEARCH_DEPTH"""
+
+    if not isinstance(text, str):
+        return None
+    if text == "human":
+        return cfg.PLAYER_HUMAN, cfg.DEFAULT_SEARCH_DEPTH
+
+    try:
+        player = selfPlay.parsePlayer(text)
+    except argparse.ArgumentTypeError:
+        return None
+
+    playerType, depth = player
+    if depth > cfg.MAX_SEARCH_DEPTH:
+        return None
+    return player
+
+def describePlayer(player):
+    if player[0] == cfg.PLAYER_HUMAN:
+        return "human"
+    return selfPlay.describePlayer(player)
+
+
+def chooseMove(position, playerType, depth, thinkTime):
+    """runs in a process of the pool and returns the move of a computer
+player. The position is the bytes of positionCode.encode() or, for boards
+that it doesn't work on, the GameState itself"""
+
+    if isinstance(position, bytes):
+        state = positionCode.decode(position)
+    else:
+        state = position
+
+    return checkerLogic.chooseComputerMove(state, playerType, depth, thinkTime)
+
+
+class Game():
+    """the game of one connection"""
+
+    def __init__(self, players, firstPlayer):
+        self.players = players
+        self.state = gameState.GameState(activePlayer=firstPlayer)
+        self.moves = 0
+        self.isDraw = False
+
+    def isOver(self):
+        return self.state.isTerminal() or self.isDraw
+
+    def isHumansTurn(self):
+        playerType, depth = self.players[self.state.activePlayer]
+        return playerType == cfg.PLAYER_HUMAN
+
+    def describe(self):
+        """returns the state of the game as a dictionary that can be sent
+as json"""
+
+        state = self.state
+        board = [
+            "".join(PIECE_CHARACTERS[(tile.player, tile.pieceType)]
+                    for tile in row)
+            for row in state.board
+            ]
+
+        return {
+            "board": board,
+            "position": positionCode.toText(state),
+            "players": {
+                str(player): describePlayer(self.players[player])
+                for player in (cfg.PLAYER_1, cfg.PLAYER_2)
+                },
+            "activePlayer": state.activePlayer,
+            "inKillChain": state.inKillChain,
+            "chainKiller": state.chainKiller,
+            "legalMoves": [] if self.isOver() else state.legalMoves(),
+            "moves": self.moves,
+            "winner": state.winner,
+            "resigned": state.loserResigned,
+            "draw": self.isDraw
+            }
+
+
+class GameServer():
+    """serves games to clients, with the computer players searching in a
+pool of worker processes"""
+
+    def __init__(self, workers=None, maxMoves=selfPlay.DEFAULT_MAX_MOVES,
+                 thinkTime=DEFAULT_THINK_TIME):
+        self.workers = workers
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+        self.maxMoves = maxMoves
+        self.thinkTime = thinkTime
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handleClient, host, port)
+        print("serving on %s:%d" %(host, port))
+
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+    async def handleClient(self, reader, writer):
+        """answers the requests of one connection until it is closed"""
+
+        game = None
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+
+                if not isinstance(request, dict):
+                    response = {"ok": False, "error": "invalid json"}
+                else:
+                    try:
+                        game, response = await self.handleRequest(
+                            game, request
+                            )
+                    except Exception as error:
+                        #a request that fails is answered like a refused
+                        #one, the connection and the other games go on
+                        response = {
+                            "ok": False, "error": "request failed: %r" %error
+                            }
+
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        except ConnectionError:
+            #the client went away
+            pass
+
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handleRequest(self, game, request):
+        """carries out one request on the game of a connection. Returns the
+game, which is a new one after a "new" command, and the response"""
+
+        command = request.get("command")
+
+        if command == "new":
+            players = {
+                cfg.PLAYER_1: parsePlayer(request.get("player1", "human")),
+                cfg.PLAYER_2: parsePlayer(request.get("player2", "smart"))
+                }
+            if None in players.values():
+                return game, {"ok": False, "error": "unknown player type"}
+
+            firstPlayer = request.get("firstPlayer", cfg.PLAYER_1)
+            if firstPlayer not in (cfg.PLAYER_1, cfg.PLAYER_2):
+                return game, {"ok": False, "error": "invalid first player"}
+
+            game = Game(players, firstPlayer)
+
+            computerMoves, error = await self.playComputerMoves(game)
+            return game, self.respond(game, error, computerMoves)
+
+        if game == None:
+            return game, {"ok": False, "error": "no game in progress"}
+
+        if command == "state":
+            return game, self.respond(game)
+
+        if command == "resign":
+            if game.isOver():
+                return game, self.respond(game, STEP_ERRORS[
+                    gameState.GAME_IS_OVER
+                    ])
+            if not game.isHumansTurn():
+                return game, self.respond(game, "it is not a human's turn")
+
+            game.state.winner = game.state.nonActivePlayer
+            game.state.loserResigned = True
+            return game, self.respond(game)
+
+        if command == "move":
+            if game.isOver():
+                return game, self.respond(game, STEP_ERRORS[
+                    gameState.GAME_IS_OVER
+                    ])
+            if not game.isHumansTurn():
+                return game, self.respond(game, "it is not a human's turn")
+
+            path = request.get("path")
+            if not isValidPath(path):
+                return game, self.respond(game, "invalid path")
+
+            error = self.makeHumanMove(game, path)
+            if error != None:
+                return game, self.respond(game, error)
+
+            computerMoves, error = await self.playComputerMoves(game)
+            return game, self.respond(game, error, computerMoves)
+
+        return game, {"ok": False, "error": "unknown command"}
+
+    def respond(self, game, error=None, computerMoves=[]):
+        if error != None:
+            return {
+                "ok": False, "error": error, "state": game.describe(),
+                "computerMoves": computerMoves
+                }
+        return {
+            "ok": True, "state": game.describe(),
+            "computerMoves": computerMoves
+            }
+
+
+    def makeHumanMove(self, game, path):
+        """makes the jumps of a path one at a time. Returns None or why a
+jump was refused"""
+
+        player = game.state.activePlayer
+
+        for i in range(len(path) - 1):
+            (row1, col1), (row2, col2) = path[i], path[i+1]
+            result = game.state.step(row1, col1, row2, col2)
+            if result != gameState.VALID_STEP:
+                return STEP_ERRORS[result]
+
+        if game.state.activePlayer != player or game.state.isTerminal():
+            #the move is over once the turn has passed
+            self.countMove(game)
+
+        return None
+
+    async def playComputerMoves(self, game):
+        """lets the computer players move until a human is to move or the
+game is over. Returns the list of their moves and None, or the moves made
+so far and why the next one failed"""
+
+        loop = asyncio.get_running_loop()
+        moves = []
+
+        while not game.isOver() and not game.isHumansTurn():
+            playerType, depth = game.players[game.state.activePlayer]
+
+            if playerType == cfg.PLAYER_CPU_DUMB:
+                #a random move is quick enough to pick here
+                move = chooseMove(game.state, playerType, depth, None)
+            else:
+                #only the position is sent to the pool, not the GameState
+                position = positionCode.encode(game.state)
+                if position == None:
+                    position = game.state
+
+                pool = self.pool
+                try:
+                    move = await loop.run_in_executor(
+                        pool, chooseMove,
+                        position, playerType, depth, self.thinkTime
+                        )
+                except concurrent.futures.process.BrokenProcessPool:
+                    #a search process died, the pool is started again for
+                    #the next request unless another game already has
+                    if self.pool is pool:
+                        pool.shutdown(wait=False)
+                        self.pool = concurrent.futures.ProcessPoolExecutor(
+                            self.workers
+                            )
+                    return moves, "the computer player failed to move"
+                except Exception as error:
+                    return moves, "the computer player failed to move: %r" %(
+                        error
+                        )
+
+            error = self.makeComputerMove(game, move)
+            if error != None:
+                return moves, "the computer player made an invalid move: %s" %(
+                    error
+                    )
+            moves.append(move)
+            self.countMove(game)
+
+        return moves, None
+
+    def makeComputerMove(self, game, move):
+        """makes a move that a computer player chose. Returns None or why a
+jump was refused, then none of the jumps are made"""
+
+        #the jumps are made on a copy so that a refused move leaves the game
+        #as it was
+        state = game.state.copy()
+
+        for i in range(len(move) - 1):
+            (row1, col1), (row2, col2) = move[i], move[i+1]
+            result = state.step(row1, col1, row2, col2)
+            if result != gameState.VALID_STEP:
+                return STEP_ERRORS[result]
+
+        game.state = state
+        return None
+
+    def countMove(self, game):
+        game.moves += 1
+        if game.moves >= self.maxMoves and not game.state.isTerminal():
+            game.isDraw = True
+
+
+def isValidPath(path):
+    """True if the path of a move is a list of at least two tiles on the
+board"""
+
+    if not isinstance(path, list) or len(path) < 2:
+        return False
+
+    for tile in path:
+        #json true and false are bools, which are ints to python
+        if (
+            not isinstance(tile, list) or len(tile) != 2
+            or not all(isinstance(number, int)
+                       and not isinstance(number, bool) for number in tile)
+            ):
+            return False
+        row, col = tile
+        if not (0 <= row < cfg.NUM_ROWS and 0 <= col < cfg.NUM_COLS):
+            return False
+
+    return True
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="serves games of checkers over the network"
+        )
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST,
+        help="the address to listen on (default %s)" %DEFAULT_HOST
+        )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT,
+        help="the port to listen on (default %d)" %DEFAULT_PORT
+        )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="how many processes the computer players search in"
+        " (default the number of cpus)"
+        )
+    parser.add_argument(
+        "--max-moves", type=int, default=selfPlay.DEFAULT_MAX_MOVES,
+        help="games longer than this are draws (default %d)"
+        %selfPlay.DEFAULT_MAX_MOVES
+        )
+    parser.add_argument(
+        "--think-time", type=float, default=DEFAULT_THINK_TIME,
+        help="seconds that a smart player searches for each move, going no"
+        " deeper than its depth, 0 for a fixed depth (default %.1f)"
+        %DEFAULT_THINK_TIME
+        )
+    args = parser.parse_args(args)
+
+    thinkTime = args.think_time
+    if thinkTime <= 0:
+        thinkTime = None
+
+    server = GameServer(args.workers, args.max_moves, thinkTime)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
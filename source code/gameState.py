@@ -0,0 +1,388 @@
+"""This file has the GameState class, which holds a game of checkers that is
+in progress: the board, whose turn it is, the kill chain and how many
+pieces each player has left.
+
+A GameState does not use tkinter, sounds or any of the game variables in
+cfg, so games can be played out without a gui. During a game with a gui the
+state is kept in cfg.gameState and the board on the screen is only a drawing
+of it."""
+
+import cfg
+import checkerLogic
+
+
+#the results of GameState.step()
+VALID_STEP = 0
+INVALID_STEP = 1
+MUST_FINISH_CHAIN = 2
+MUST_ATTACK = 3
+GAME_IS_OVER = 4
+
+
+def tilesNear(row, col):
+    """returns the tiles whose pieces could gain or lose a move when the
+tile at (row, col) changes: the tile itself and the tiles one or two
+diagonal steps away from it"""
+
+    tiles = [(row, col)]
+
+    for rowChange, colChange in ((1, -1), (1, 1), (-1, -1), (-1, 1)):
+        for distance in (1, 2):
+            nearRow = row + rowChange * distance
+            nearCol = col + colChange * distance
+
+            if 0 <= nearRow < cfg.NUM_ROWS and 0 <= nearCol < cfg.NUM_COLS:
+                tiles.append((nearRow, nearCol))
+
+    return tiles
+
+#the tiles near every tile of the board, built once for the board size
+nearbyTiles = [
+    [tilesNear(row, col) for col in range(cfg.NUM_COLS)]
+    for row in range(cfg.NUM_ROWS)
+    ]
+
+
+def otherPlayer(player):
+    if player == cfg.PLAYER_1:
+        return cfg.PLAYER_2
+    return cfg.PLAYER_1
+
+def startingBoard():
+    """returns a ModelBoard set up for the start of a standard game of
+checkers. This is the same layout that populateBoard() makes"""
+
+    board = []
+    for row in range(cfg.NUM_ROWS):
+        board.append([])
+        for col in range(cfg.NUM_COLS):
+            board[row].append(
+                checkerLogic.ModelTile(cfg.UNOCCUPIED, cfg.NO_PIECE)
+                )
+
+    magicNumber = int(cfg.NUM_ROWS/2 - 1)
+
+    for row in range(cfg.NUM_ROWS):
+        if row < magicNumber:
+            player = cfg.PLAYER_1
+        elif row >= cfg.NUM_ROWS - magicNumber:
+            player = cfg.PLAYER_2
+        else:
+            continue
+
+        for col in range(cfg.NUM_COLS):
+            if col % 2 == row % 2:
+                board[row][col].player = player
+                board[row][col].pieceType = cfg.CHECKER_MAN
+
+    return checkerLogic.ModelBoard(board)
+
+
+class GameState():
+    """a game of checkers that does not depend on the gui.
+
+The board is a ModelBoard indexed with [row][col]. Moves are made
+either one jump at a time with step(), the way a human player makes them
+by clicking, or a whole move (a list of (row, col) tuples as returned by
+legalMoves()) at a time with apply()."""
+
+    def __init__(self, board=None, activePlayer=cfg.PLAYER_1):
+        if board == None:
+            board = startingBoard()
+        elif not isinstance(board, checkerLogic.ModelBoard):
+            board = checkerLogic.ModelBoard(board)
+
+        self.board = board
+
+        self.activePlayer = activePlayer
+        self.nonActivePlayer = otherPlayer(activePlayer)
+
+        #the number of pieces that each player has on the board
+        self.playerPieces = {
+            player: len(pieces) for player, pieces in board.pieces.items()
+            }
+
+        #a kill chain has to be finished by the piece at chainKiller
+        self.inKillChain = False
+        self.chainKiller = None
+
+        #the (row, col) of every piece of each player that can kill and of
+        #every piece that can make a simple move. They are kept up to date
+        #after each step by only looking at the tiles near the ones that
+        #changed
+        self.killers = {cfg.PLAYER_1: set(), cfg.PLAYER_2: set()}
+        self.movers = {cfg.PLAYER_1: set(), cfg.PLAYER_2: set()}
+
+        for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+            for row, col in list(board.pieces[player]):
+                self.updatePiece(row, col)
+
+        #the pieces of the active player that can attack, as (row, col)
+        self.obligatedPieces = []
+
+        #set once the game is over
+        self.winner = None
+        self.loserResigned = False
+
+        #the tiles that were changed by the last call to step() and whether
+        #that step killed a piece, so that they can be redrawn
+        self.changedTiles = []
+        self.lastStepKilled = False
+
+        self.checkForObligatedPieces()
+        if len(self.obligatedPieces) == 0:
+            self.mustIResign()
+
+    @staticmethod
+    def fromBoard(board, activePlayer):
+        """makes a GameState from a copy of a 2d list of Tiles or
+ModelTiles, such as the game board after populateBoard()"""
+        return GameState(checkerLogic.produceModelBoard(board), activePlayer)
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+
+        state.board = checkerLogic.produceModelBoard(self.board)
+        state.playerPieces = dict(self.playerPieces)
+        state.obligatedPieces = list(self.obligatedPieces)
+        state.killers = {
+            player: set(pieces) for player, pieces in self.killers.items()
+            }
+        state.movers = {
+            player: set(pieces) for player, pieces in self.movers.items()
+            }
+        state.changedTiles = []
+        return state
+
+
+    def isTerminal(self):
+        """True once the game is over"""
+        return self.winner != None
+
+    def legalMoves(self):
+        """returns every move that the active player can make, each one a
+list of (row, col) tuples. In a kill chain only the ways of finishing the
+chain are returned"""
+
+        if self.isTerminal():
+            return []
+
+        if self.inKillChain:
+            row, col = self.chainKiller
+            return checkerLogic.killPaths(
+                row, col, self.activePlayer,
+                self.board[row][col].pieceType, self.board
+                )
+
+        return checkerLogic.possibleMoves(self.activePlayer, self.board)
+
+    def apply(self, move):
+        """makes a whole move, a list of (row, col) tuples, one jump at a
+time. Returns False if one of the jumps was not valid, the jumps before it
+stay made"""
+
+        for i in range(len(move)-1):
+            prev = move[i]
+            curr = move[i+1]
+            if self.step(prev[0], prev[1], curr[0], curr[1]) != VALID_STEP:
+                return False
+
+        return True
+
+
+    def shouldIBeKing(self, row, col):
+        """determines if the passed in piece should be a king and
+if so makes the piece a king"""
+
+        kingCandidate = self.board[row][col]
+
+        if kingCandidate.pieceType == cfg.CHECKER_KING:
+            return False
+
+        if (
+            (row == cfg.NUM_ROWS - 1 and kingCandidate.player == cfg.PLAYER_1)
+            or (row == 0 and kingCandidate.player == cfg.PLAYER_2)
+            ):
+            checkerLogic.setModelTile(
+                self.board, row, col, kingCandidate.player, cfg.CHECKER_KING
+                )
+            return True
+
+        return False
+
+    def updatePiece(self, row, col):
+        """works out again whether the piece on a tile can kill and whether
+it can make a simple move"""
+
+        for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+            self.killers[player].discard((row, col))
+            self.movers[player].discard((row, col))
+
+        tile = self.board[row][col]
+        if tile.player == cfg.UNOCCUPIED:
+            return
+
+        if len(checkerLogic.whereCanIKill(
+            row, col, tile.player, tile.pieceType, self.board
+            )) != 0:
+            self.killers[tile.player].add((row, col))
+
+        if len(checkerLogic.whereCanIMove(
+            row, col, tile.player, tile.pieceType, self.board
+            )) != 0:
+            self.movers[tile.player].add((row, col))
+
+    def updatePiecesNear(self, tiles):
+        """updates every piece that a change to the given tiles could have
+given or taken away a move from"""
+
+        updated = set()
+
+        for row, col in tiles:
+            for nearTile in nearbyTiles[row][col]:
+                if nearTile not in updated:
+                    updated.add(nearTile)
+                    self.updatePiece(nearTile[0], nearTile[1])
+
+    def hasLegalMove(self):
+        """True if the active player has a piece that can kill or move"""
+        return (
+            len(self.killers[self.activePlayer]) != 0
+            or len(self.movers[self.activePlayer]) != 0
+            )
+
+    def checkForObligatedPieces(self):
+        """finds the pieces of the active player that can attack now"""
+
+        self.obligatedPieces = sorted(self.killers[self.activePlayer])
+
+    def mustIResign(self):
+        """Checks if all of the active player's pieces cannot move.
+If so then the game is over and the other player wins"""
+
+        if not self.hasLegalMove():
+            self.winner = self.nonActivePlayer
+            self.loserResigned = True
+
+
+    def step(self, row1, col1, row2, col2):
+        """Computes whether a single jump is valid and if so makes it.
+row1 and col1 are for the initial tile and row2, col2 are for the
+destination tile. Returns VALID_STEP if the jump was made, otherwise one of
+the other results says why it was refused and nothing was changed.
+
+If a piece can jump another piece after a jump it has to immediately.
+No piece but this one may be moved until the chain is over"""
+
+        self.changedTiles = []
+        self.lastStepKilled = False
+
+        if self.isTerminal():
+            #no moves can be made during game over
+            return GAME_IS_OVER
+
+        curr = self.board[row1][col1]
+        dest = self.board[row2][col2]
+
+        if curr.player != self.activePlayer:
+            return INVALID_STEP
+
+        if curr.pieceType != cfg.CHECKER_KING:
+            #the king can move in any direction
+            if self.activePlayer == cfg.PLAYER_1 and row1 >= row2:
+                #player 1 may not move backwards or on the same row
+                return INVALID_STEP
+
+            if self.activePlayer == cfg.PLAYER_2 and row2 >= row1:
+                #player 2 may not move backwards or on the same row
+                return INVALID_STEP
+
+        if abs(row2 - row1) != abs(col2 - col1):
+            #non diagonal movement is invalid
+            return INVALID_STEP
+
+        if abs(row2 - row1) > 2:
+            #the player should never be able to move more than 2 tiles
+            #at a time
+            return INVALID_STEP
+
+        if dest.player != cfg.UNOCCUPIED:
+            #if the destination is already occupied
+            return INVALID_STEP
+
+        if self.inKillChain:
+            #if a player can immediately make another killing jump they
+            #have to and they can only move the same piece
+            if (row1, col1) != self.chainKiller:
+                return MUST_FINISH_CHAIN
+            if abs(row2 - row1) == 1:
+                #a move of one space is never a killing move
+                return MUST_FINISH_CHAIN
+
+        elif len(self.obligatedPieces) != 0:
+            #the player must attack with a piece that can kill
+            if (row1, col1) not in self.obligatedPieces:
+                return MUST_ATTACK
+            if abs(row2 - row1) == 1:
+                #a nonkilling move in invalid
+                return MUST_ATTACK
+
+        if abs(row2 - row1) == 1:
+            checkerLogic.makeModelMove(row1, col1, row2, col2, self.board)
+            self.changedTiles = [(row1, col1), (row2, col2)]
+
+            #checks if the piece is now qualified to become a king
+            self.shouldIBeKing(row2, col2)
+
+            self.updatePiecesNear(self.changedTiles)
+
+        else:
+            #the piece between curr and dest has to be an enemy
+            midRow = (row1 + row2) // 2
+            midCol = (col1 + col2) // 2
+
+            if self.board[midRow][midCol].player != self.nonActivePlayer:
+                return INVALID_STEP
+
+            checkerLogic.makeModelMove(row1, col1, row2, col2, self.board)
+            self.changedTiles = [(row1, col1), (midRow, midCol), (row2, col2)]
+            self.lastStepKilled = True
+
+            self.playerPieces[self.nonActivePlayer] -= 1
+
+            #checks if a piece has become a king, this is important for
+            #determining if a chain kill should continue
+            self.shouldIBeKing(row2, col2)
+
+            self.updatePiecesNear(self.changedTiles)
+
+            if (row2, col2) in self.killers[self.activePlayer]:
+                #if a piece can kill after killing then a chain kill has begun
+                self.inKillChain = True
+                self.chainKiller = (row2, col2)
+            else:
+                self.inKillChain = False
+                self.chainKiller = None
+
+        #check if the game is now over
+        if self.playerPieces[self.nonActivePlayer] == 0:
+            self.winner = self.activePlayer
+            return VALID_STEP
+
+        #change active player. in a chain jump the player
+        #should not be changed
+        if not self.inKillChain:
+            self.activePlayer, self.nonActivePlayer = (
+                self.nonActivePlayer, self.activePlayer
+                )
+
+        #looks for pieces on the board that can now attack for the active
+        #player
+        self.checkForObligatedPieces()
+
+        if len(self.obligatedPieces) == 0:
+            #if there are obligated pieces then obviously the player can move
+            self.mustIResign()
+
+        return VALID_STEP
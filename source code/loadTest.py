@@ -0,0 +1,162 @@
+"""This file measures how many games gameServer.py can play at once.
+
+It opens many connections to a running server at the same time and plays
+games on each of them, a human player that makes random legal moves against
+a computer player of the server. Every request is timed, and at the end the
+number of requests and moves per second and how long the answers took are
+printed.
+
+Example, with the server running:
+    python gameServer.py --workers 4
+    python loadTest.py --connections 50 --games 2 --opponent smart:4"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import gameServer
+
+
+DEFAULT_CONNECTIONS = 20
+DEFAULT_GAMES = 1
+DEFAULT_OPPONENT = "dumb"
+
+
+class Results():
+    """what every connection has done, added up"""
+
+    def __init__(self):
+        self.latencies = []
+        self.moves = 0
+        self.games = 0
+        self.errors = 0
+
+
+async def request(reader, writer, message, results):
+    """sends one request and returns the answer"""
+
+    startTime = time.perf_counter()
+
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+
+    results.latencies.append(time.perf_counter() - startTime)
+    if not response["ok"]:
+        results.errors += 1
+    return response
+
+async def playGames(host, port, numGames, opponent, seed, results):
+    """plays games over one connection"""
+
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        for game in range(numGames):
+            response = await request(reader, writer, {
+                "command": "new", "player1": "human", "player2": opponent,
+                "firstPlayer": rng.choice((1, 2))
+                }, results)
+
+            while True:
+                state = response["state"]
+                results.moves += len(response.get("computerMoves", []))
+
+                if state["winner"] != None or state["draw"]:
+                    break
+
+                move = rng.choice(state["legalMoves"])
+                response = await request(reader, writer, {
+                    "command": "move", "path": move
+                    }, results)
+                if not response["ok"]:
+                    break
+                results.moves += 1
+
+            results.games += 1
+
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def runLoadTest(host, port, numConnections, numGames, opponent, seed):
+    results = Results()
+
+    await asyncio.gather(*[
+        playGames(host, port, numGames, opponent, seed + i, results)
+        for i in range(numConnections)
+        ])
+
+    return results
+
+
+def printReport(results, seconds):
+    print("%d games, %d moves and %d requests in %.2f seconds"
+          %(results.games, results.moves, len(results.latencies), seconds))
+    print("%.1f requests per second, %.1f moves per second"
+          %(len(results.latencies) / seconds, results.moves / seconds))
+
+    if len(results.latencies) != 0:
+        latencies = sorted(results.latencies)
+        print("latency: mean %.1f ms, median %.1f ms, 95%% %.1f ms,"
+              " max %.1f ms" %(
+                  1000 * statistics.mean(latencies),
+                  1000 * statistics.median(latencies),
+                  1000 * latencies[int(0.95 * (len(latencies) - 1))],
+                  1000 * latencies[-1]
+                  ))
+
+    if results.errors != 0:
+        print("%d requests were refused" %results.errors)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="plays many games against gameServer.py at once and"
+        " measures how fast it answers"
+        )
+    parser.add_argument(
+        "--host", default=gameServer.DEFAULT_HOST,
+        help="the address of the server (default %s)"
+        %gameServer.DEFAULT_HOST
+        )
+    parser.add_argument(
+        "--port", type=int, default=gameServer.DEFAULT_PORT,
+        help="the port of the server (default %d)" %gameServer.DEFAULT_PORT
+        )
+    parser.add_argument(
+        "--connections", type=int, default=DEFAULT_CONNECTIONS,
+        help="how many connections play at once (default %d)"
+        %DEFAULT_CONNECTIONS
+        )
+    parser.add_argument(
+        "--games", type=int, default=DEFAULT_GAMES,
+        help="how many games each connection plays (default %d)"
+        %DEFAULT_GAMES
+        )
+    parser.add_argument(
+        "--opponent", default=DEFAULT_OPPONENT,
+        help="the computer player that the server plays with, dumb, smart"
+        " or smart:DEPTH (default %s)" %DEFAULT_OPPONENT
+        )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed for the random moves of the human players"
+        )
+    args = parser.parse_args(args)
+
+    startTime = time.perf_counter()
+    results = asyncio.run(runLoadTest(
+        args.host, args.port, args.connections, args.games, args.opponent,
+        args.seed
+        ))
+    printReport(results, time.perf_counter() - startTime)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""This file has the opening book of the smart computer player.
+
+Every game starts from the same position, so the first moves of a game
+would be searched again every game with the same results. The book is a
+json file made ahead of time with deep searches that lists the best moves
+of the positions near the start of the game, keyed by their zobrist keys.
+While a game is still in the book the smart player picks one of the moves
+listed for the position, choosing between them by their weights, without
+searching at all. The best move has the highest weight and a move that
+searched a little worse has a lower weight, so the player doesn't always
+play the same game.
+
+The book is loaded the first time it is needed. A missing book or a book
+made for another size of board is treated as an empty book.
+
+To build a book that covers every position up to 4 moves into the game
+with the best moves of a 7 move deep search:
+    python openingBook.py --plies 4 --depth 7"""
+
+import argparse
+import json
+import os
+import time
+
+import cfg
+import checkerLogic
+import checkerSearch
+import gameState
+import zobrist
+
+
+#the book next to this file
+BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), cfg.OPENING_BOOK_FILE
+    )
+
+DEFAULT_PLIES = 4
+DEFAULT_DEPTH = 7
+
+#moves that score up to this much below the best move are kept in the book
+#as well, with a weight of BOOK_MARGIN + 1 less how much worse they are
+BOOK_MARGIN = 10
+
+#the loaded book: position key -> list of (move, weight). None until it
+#has been loaded
+book = None
+
+
+def stateKey(state):
+    """the key that the position of a GameState has in the book"""
+    return zobrist.positionKey(state.board.zobristKey, state.activePlayer)
+
+
+def loadBook(path=BOOK_PATH):
+    """reads a book file and returns its positions as a dictionary of
+position key to a list of (move, weight). Moves are lists of (row, col)
+tuples like the ones possibleMoves() returns"""
+
+    try:
+        with open(path) as bookFile:
+            data = json.load(bookFile)
+    except (OSError, ValueError):
+        #no book has been made yet or it can't be read
+        return {}
+
+    if data.get("rows") != cfg.NUM_ROWS or data.get("cols") != cfg.NUM_COLS:
+        return {}
+
+    positions = {}
+    for key, entries in data["positions"].items():
+        positions[int(key, 16)] = [
+            ([tuple(coords) for coords in move], weight)
+            for move, weight in entries
+            ]
+
+    return positions
+
+def getBook():
+    """returns the book, loading it the first time it is asked for"""
+
+    global book
+
+    if book == None:
+        book = loadBook()
+
+    return book
+
+
+def chooseBookMove(state):
+    """returns a move from the book for the active player of a GameState,
+picked at random with the weights of the moves in the book. Returns None if
+the book is turned off or the position isn't in the book"""
+
+    if not cfg.useOpeningBook or state.inKillChain:
+        return None
+
+    entries = getBook().get(stateKey(state))
+    if entries == None:
+        return None
+
+    #a move from another position with the same key could never be legal
+    legalMoves = state.legalMoves()
+    entries = [(move, weight) for move, weight in entries
+               if move in legalMoves]
+    if len(entries) == 0:
+        return None
+
+    moves = [move for move, weight in entries]
+    weights = [weight for move, weight in entries]
+    return cfg.rng.choices(moves, weights)[0]
+
+
+def scoreMoves(state, depth, table=None):
+    """returns the exact score of every legal move of the active player of
+a GameState, searched depth moves deep, as a list of (move, score)"""
+
+    board = checkerLogic.produceModelBoard(state.board)
+    enemy = state.nonActivePlayer
+    scores = []
+
+    for move in state.legalMoves():
+        #a full window, so that the moves that are worse than the best one
+        #are scored exactly as well
+        record = checkerLogic.applyModelMove(move, board)
+        score = -checkerSearch.negamax(
+            board, enemy, depth - 1, -checkerSearch.WIN_SCORE * 2,
+            checkerSearch.WIN_SCORE * 2, None, table, 1
+            )
+        checkerLogic.undoModelMove(record, board)
+        scores.append((move, score))
+
+    return scores
+
+def weighMoves(scores):
+    """returns the (move, weight) of the moves that score no more than
+BOOK_MARGIN below the best one, the best moves weighing the most"""
+
+    bestScore = max(score for move, score in scores)
+    return [
+        (move, BOOK_MARGIN + 1 - (bestScore - score))
+        for move, score in scores
+        if bestScore - score <= BOOK_MARGIN
+        ]
+
+
+def buildBook(plies, depth):
+    """searches every position that can be reached in plies moves from the
+start of the game depth moves deep and returns the book of their best
+moves, weighed by weighMoves(). Either player may start the game"""
+
+    positions = {}
+    states = [
+        gameState.GameState(activePlayer=cfg.PLAYER_1),
+        gameState.GameState(activePlayer=cfg.PLAYER_2)
+        ]
+
+    for ply in range(plies):
+        nextStates = []
+        startTime = time.perf_counter()
+
+        for state in states:
+            key = stateKey(state)
+            if key in positions or state.isTerminal():
+                #a position reached by another order of moves
+                continue
+
+            scores = scoreMoves(
+                state, depth, checkerSearch.getTranspositionTable()
+                )
+            positions[key] = weighMoves(scores)
+
+            #the other player may answer with any move, so every answer
+            #has to be in the book
+            for move in state.legalMoves():
+                nextState = state.copy()
+                nextState.apply(move)
+                nextStates.append(nextState)
+
+        print("ply %d: %d positions in the book, %.1f seconds"
+              %(ply + 1, len(positions), time.perf_counter() - startTime))
+        states = nextStates
+
+    return positions
+
+def saveBook(positions, path, plies, depth):
+    data = {
+        "rows": cfg.NUM_ROWS,
+        "cols": cfg.NUM_COLS,
+        "plies": plies,
+        "depth": depth,
+        "positions": {
+            "%016x" %key: [
+                [[list(coords) for coords in move], weight]
+                for move, weight in entries
+                ]
+            for key, entries in positions.items()
+            }
+        }
+
+    with open(path, "w") as bookFile:
+        json.dump(data, bookFile, separators=(",", ":"))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="builds the opening book of the smart computer player"
+        )
+    parser.add_argument(
+        "--plies", type=int, default=DEFAULT_PLIES,
+        help="how many moves into the game the book goes (default %d)"
+        %DEFAULT_PLIES
+        )
+    parser.add_argument(
+        "--depth", type=int, default=DEFAULT_DEPTH,
+        help="how many moves deep every position is searched (default %d)"
+        %DEFAULT_DEPTH
+        )
+    parser.add_argument(
+        "--output", default=BOOK_PATH,
+        help="where to save the book (default %s)" %cfg.OPENING_BOOK_FILE
+        )
+    args = parser.parse_args(args)
+
+    cfg.soundEnabled = False
+    positions = buildBook(args.plies, args.depth)
+    saveBook(positions, args.output, args.plies, args.depth)
+    print("saved %d positions to %s" %(len(positions), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""This file lets the smart computer player search the moves of a position
+in several processes at once.
+
+A search holds the GIL for as long as it runs, so it can only ever use one
+core from one process. searchMoves() shares the moves of the position out
+between the processes of a pool instead. Each process is sent the position
+as bitboards (see bitboard.py) with the player to move and its share of the
+moves, searches them with checkerSearch.searchMoveList() and sends back its
+best moves and their score, and the best of those are kept.
+
+The moves are dealt out in the order that the search would try them, so
+every process starts with some of the likely best moves. A process only
+knows the best score of its own moves, so it can't cut off as much as one
+search of every move could, but the best moves found and the order they come
+back in are the same as searching in one process. The processes share one
+transposition table in shared memory, see transpositionTable.py.
+
+The processes are started with spawn rather than fork, as forking the gui
+while the computer player thread is running is not safe. They are started
+the first time they are needed, which takes a moment, and are kept until
+shutDownPool() is called. cfg.searchWorkers sets how many there are. A
+spawned process starts with the cfg.py defaults, so the settings in
+WORKER_SETTINGS are sent to it when it starts, and the pool is started
+again if they change."""
+
+import concurrent.futures
+import multiprocessing
+import time
+
+import cfg
+import bitboard
+import checkerSearch
+import positionCode
+import transpositionTable
+
+
+#returned by searchMoves() when the search has to be done in this process
+CANT_SEARCH = -1
+
+#how many seconds searchMoves() waits for the processes at a time before it
+#checks whether checkerSearch.stopSearches() was called
+STOP_CHECK_INTERVAL = .1
+
+#the cfg settings that the search processes are given when they start
+WORKER_SETTINGS = ("useBitboards", "transpositionTableMB")
+
+#the pool of search processes and what it was started with, see
+#poolSettings()
+pool = None
+startedWith = None
+
+#in a search process, the shared transposition table of the process that
+#started the pool
+workerTable = None
+
+
+def poolSettings():
+    """returns (number of processes, tableInfo, settings), what a pool
+started now would be started with. tableInfo is the (name, numBuckets) of
+the shared transposition table or None and settings are the values of
+WORKER_SETTINGS"""
+
+    #the processes are told where to find the shared table
+    table = checkerSearch.getTranspositionTable()
+    if isinstance(table, transpositionTable.SharedTranspositionTable):
+        tableInfo = (table.name, table.numBuckets)
+    else:
+        tableInfo = None
+
+    settings = tuple(getattr(cfg, name) for name in WORKER_SETTINGS)
+    return cfg.searchWorkers, tableInfo, settings
+
+def getPool():
+    """returns the pool of search processes, starting it the first time or
+again if cfg.searchWorkers, the transposition table or one of the
+WORKER_SETTINGS has changed"""
+
+    global pool, startedWith
+
+    settings = poolSettings()
+
+    if pool != None and startedWith != settings:
+        shutDownPool()
+
+    if pool == None:
+        workers, tableInfo, workerSettings = settings
+        pool = concurrent.futures.ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=startWorker, initargs=(tableInfo, workerSettings)
+            )
+        startedWith = settings
+
+    return pool
+
+def shutDownPool():
+    """stops the search processes, searches that are running are let
+finish in the background"""
+
+    global pool
+
+    if pool != None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = None
+
+
+def startWorker(tableInfo, settings):
+    """runs in each process of the pool when it starts. tableInfo is the
+(name, numBuckets) of the shared transposition table or None if there isn't
+one, in which case the process makes its own table if
+cfg.transpositionTableMB isn't 0. settings are the values of
+WORKER_SETTINGS in the process that started the pool"""
+
+    global workerTable
+
+    for name, value in zip(WORKER_SETTINGS, settings):
+        setattr(cfg, name, value)
+
+    #a search process searches its moves by itself
+    cfg.searchWorkers = 1
+
+    if tableInfo != None:
+        name, numBuckets = tableInfo
+        try:
+            workerTable = transpositionTable.SharedTranspositionTable(
+                name=name, numBuckets=numBuckets
+                )
+        except FileNotFoundError:
+            #the table was closed while the pool was shutting down, this
+            #process won't be given any searches
+            workerTable = None
+
+def searchInWorker(data, moves, depth, timeLeft):
+    """runs in a process of the pool and searches the moves from the
+position in data, made by positionCode.encodePosition(). timeLeft is how
+many seconds the search may take or None"""
+
+    p1, p2, kings, player, chainSquare = positionCode.decodePosition(data)
+
+    deadline = None
+    if timeLeft != None:
+        deadline = time.perf_counter() + timeLeft
+
+    table = workerTable
+    if table == None:
+        table = checkerSearch.getTranspositionTable()
+
+    return checkerSearch.searchMoveList(
+        bitboard.toBoard(p1, p2, kings), player, moves, depth, deadline, table
+        )
+
+
+def searchMoves(board, player, moves, depth, deadline=None):
+    """searches the moves of the player on the board depth moves deep in
+the processes of the pool and returns what checkerSearch.searchMoveList()
+would. The moves should be in the order that they would be searched in.
+
+Returns CANT_SEARCH if the board can't be sent to the pool as bitboards or
+the pool has stopped working, the caller should search in this process
+instead. Returns None right away if checkerSearch.stopSearches() is
+called, the processes finish their searches in the background"""
+
+    bitboards = bitboard.fromBoard(board)
+    if bitboards == None:
+        return CANT_SEARCH
+    data = positionCode.encodePosition(*bitboards, player)
+
+    timeLeft = None
+    if deadline != None:
+        timeLeft = deadline - time.perf_counter()
+        if timeLeft <= 0:
+            return None
+
+    numShares = min(cfg.searchWorkers, len(moves))
+    shares = [moves[i::numShares] for i in range(numShares)]
+
+    try:
+        searchPool = getPool()
+        futures = [
+            searchPool.submit(
+                searchInWorker, data, share, depth, timeLeft
+                )
+            for share in shares
+            ]
+        waiting = futures
+        while len(waiting) != 0:
+            if checkerSearch.stopRequested:
+                return None
+            done, waiting = concurrent.futures.wait(
+                waiting, STOP_CHECK_INTERVAL
+                )
+        results = [future.result() for future in futures]
+    except concurrent.futures.process.BrokenProcessPool:
+        #a search process died, the pool is started again next time
+        shutDownPool()
+        return CANT_SEARCH
+
+    if None in results:
+        #the time ran out
+        return None
+
+    bestScore = max(score for shareMoves, score in results)
+
+    #the best moves are put back in the order of the moves that were given
+    bestMoves = set()
+    for shareMoves, score in results:
+        if score == bestScore:
+            bestMoves.update(tuple(move) for move in shareMoves)
+
+    return [move for move in moves if tuple(move) in bestMoves], bestScore
@@ -0,0 +1,215 @@
+"""This file counts the moves that can be made from a position to a given
+depth (perft), to check that the move generator is right and to measure how
+fast it is.
+
+Every legal move of the player to move is made on a model board, then every
+answer of the other player and so on, and the positions at the given depth
+are counted. A whole kill chain is one move, as it is in possibleMoves().
+The counts are compared with the reference counts stored below, so a change
+to possibleMoves(), killPaths() or the bitboard move generator can be
+checked to still find exactly the same moves while timing how fast it is.
+
+The reference counts of the standard starting position are the well known
+counts for checkers. The other positions test the rules of this game, like
+a man that is crowned in the middle of a kill chain going on as a king, so
+their counts were made with this program and checked with both the tile
+and the bitboard move generators. All reference counts are for an 8 by 8
+board.
+
+Example:
+    python perft.py --depth 6 --engine tiles"""
+
+import argparse
+import sys
+import time
+
+import cfg
+import checkerLogic
+import gameState
+
+
+#the characters used to draw the positions below
+DIAGRAM_PIECES = {
+    ".": (cfg.UNOCCUPIED, cfg.NO_PIECE),
+    "r": (cfg.PLAYER_1, cfg.CHECKER_MAN),
+    "R": (cfg.PLAYER_1, cfg.CHECKER_KING),
+    "b": (cfg.PLAYER_2, cfg.CHECKER_MAN),
+    "B": (cfg.PLAYER_2, cfg.CHECKER_KING)
+    }
+
+#(name, diagram, player to move, {depth: number of positions}).
+#The diagrams are drawn the way the board looks, with the top row first.
+#r is a man of player one (red), b is a man of player two (blue) and
+#the capital letters are kings. None is the standard starting position
+POSITIONS = [
+    ("start", None, cfg.PLAYER_1, {
+        1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361, 6: 36768, 7: 179740,
+        8: 845931
+        }),
+
+    #the king has several long kill chains that cross each other and one
+    #that comes back to where it started
+    ("king multi jump", """
+        . . . . . . . .
+        . . b . b . . .
+        . . . . . . . .
+        . . b . b . . .
+        . . . R . . . .
+        . . b . b . . .
+        . . . . . . . .
+        r . . . . . B .
+        """, cfg.PLAYER_1, {
+        1: 6, 2: 23, 3: 63, 4: 441, 5: 1293, 6: 8149, 7: 23274
+        }),
+
+    #the man is crowned after its first kill and goes on killing as a king
+    ("promotion mid chain", """
+        . . . . . . . .
+        . . . . b . b .
+        . . . r . . . .
+        . . . . . . b .
+        . . . . . . . .
+        . . b . . . . .
+        . r . . . . . .
+        . . . . . . . .
+        """, cfg.PLAYER_1, {
+        1: 2, 2: 2, 3: 4, 4: 4, 5: 16, 6: 64, 7: 214
+        }),
+
+    #the same for player two, who is crowned on the bottom row
+    ("blue promotion mid chain", """
+        . . . . . . . .
+        . . . . . . . .
+        . . . . . r . .
+        . . . . . . . .
+        . . . . . . . .
+        . . . . b . . .
+        . r . r . . . .
+        . . . . . . . .
+        """, cfg.PLAYER_2, {
+        1: 1, 2: 2, 3: 4, 4: 8, 5: 32, 6: 56, 7: 147
+        }),
+
+    ("kings endgame", """
+        . . . . . . . B
+        . . . . . . . .
+        . . . b . . . .
+        . . . . . . R .
+        . . . . . . . .
+        . . R . . . . .
+        . . . . . . . .
+        . . . . . . . .
+        """, cfg.PLAYER_1, {
+        1: 8, 2: 24, 3: 133, 4: 449, 5: 2371, 6: 8369
+        })
+    ]
+
+
+def boardFromDiagram(diagram):
+    """makes a ModelBoard from one of the diagrams above"""
+
+    lines = [line.split() for line in diagram.strip().splitlines()]
+
+    board = []
+    for row in range(len(lines)):
+        #the first line of the diagram is the top row of the board
+        line = lines[len(lines) - 1 - row]
+        board.append([
+            checkerLogic.ModelTile(*DIAGRAM_PIECES[char]) for char in line
+            ])
+
+    return checkerLogic.ModelBoard(board)
+
+
+def perft(board, player, depth):
+    """returns the number of positions that are depth moves away from the
+board with the player to move. The board is the same when this returns"""
+
+    if depth == 0:
+        return 1
+
+    moves = checkerLogic.possibleMoves(player, board)
+
+    if depth == 1:
+        return len(moves)
+
+    enemy = gameState.otherPlayer(player)
+    count = 0
+
+    for move in moves:
+        record = checkerLogic.applyModelMove(move, board)
+        count += perft(board, enemy, depth - 1)
+        checkerLogic.undoModelMove(record, board)
+
+    return count
+
+
+def runPosition(name, diagram, player, references, maxDepth):
+    """counts a position at every depth up to maxDepth, printing the counts
+and speed. Returns False if a count does not match its reference"""
+
+    if diagram == None:
+        board = gameState.startingBoard()
+    else:
+        board = boardFromDiagram(diagram)
+
+    print(name)
+    allMatch = True
+
+    for depth in range(1, maxDepth + 1):
+        startTime = time.perf_counter()
+        count = perft(board, player, depth)
+        seconds = time.perf_counter() - startTime
+
+        if depth not in references:
+            result = "no reference"
+        elif references[depth] == count:
+            result = "ok"
+        else:
+            result = "WRONG, expected %d" %references[depth]
+            allMatch = False
+
+        print("  depth %d: %d positions in %.3f seconds, %.0f per second, %s"
+              %(depth, count, seconds, count / max(seconds, 1e-9), result))
+
+    return allMatch
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="counts the positions reachable from test positions"
+        )
+    parser.add_argument(
+        "--depth", type=int, default=5,
+        help="how many moves deep to count (default 5)"
+        )
+    parser.add_argument(
+        "--position", default=None,
+        help="only count the position with this name"
+        )
+    parser.add_argument(
+        "--engine", choices=["tiles", "bitboards"], default="bitboards",
+        help="the move generator to use (default bitboards)"
+        )
+    args = parser.parse_args(args)
+
+    cfg.useBitboards = args.engine == "bitboards"
+
+    if cfg.NUM_ROWS != 8 or cfg.NUM_COLS != 8:
+        print("the test positions are only for an 8 by 8 board")
+        return 1
+
+    allMatch = True
+    for name, diagram, player, references in POSITIONS:
+        if args.position == None or args.position == name:
+            if not runPosition(name, diagram, player, references, args.depth):
+                allMatch = False
+
+    if not allMatch:
+        print("some counts were wrong")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
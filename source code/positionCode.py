@@ -0,0 +1,273 @@
+"""This file turns positions into a few bytes or a line of text and back.
+
+A position is the pieces on the board, the player to move and, in the
+middle of a kill chain, the square of the piece that has to finish it. The
+pieces are kept as the three bitboards of bitboard.py, so a position is one
+integer with
+
+    the pieces of player one            NUM_SQUARES bits
+    the pieces of player two            NUM_SQUARES bits
+    the kings                           NUM_SQUARES bits
+    the player to move                  1 bit, set for player two
+    the chain square + 1, 0 for none    the rest
+
+and encode() gives it as bytes, 13 of them on an 8x8 board. Equal positions
+always give equal bytes, so they can be used as dictionary keys, sent to
+other processes or saved, and making them or reading them back is much
+quicker than copying the tiles of a board.
+
+The text form is the FEN of PDN files, the player to move and then the
+squares of the pieces of each player, with a K before kings:
+    B:W21,22,K30:B1,2,3
+Player one is black, who starts on squares 1 to 12, and player two is
+white. Squares are numbered the way PDN numbers them, starting at row 0 and
+going along each row from the highest column to the lowest, so that the
+squares of a game match the ones in other programs and books. In a kill
+chain ":C" and the square of the chain killer is added at the end.
+
+Positions only work on boards where bitboards work, encode() and toText()
+return None for other boards and decode() and fromText() return None for
+anything that isn't a valid position."""
+
+import cfg
+import bitboard
+import gameState
+
+
+#bitboard.SQUARES_PER_ROW and NUM_SQUARES, which bitboard.py may not have
+#set yet when this file is imported
+SQUARES_PER_ROW = cfg.NUM_COLS // 2
+NUM_SQUARES = SQUARES_PER_ROW * cfg.NUM_ROWS
+
+#where each part of a position starts in its integer
+P2_SHIFT = NUM_SQUARES
+KINGS_SHIFT = 2 * NUM_SQUARES
+PLAYER_SHIFT = 3 * NUM_SQUARES
+CHAIN_SHIFT = PLAYER_SHIFT + 1
+
+#the number of bytes of an encoded position
+NUM_BYTES = (CHAIN_SHIFT + NUM_SQUARES.bit_length() + 7) // 8
+
+#the letters of the players in the text form
+PLAYER_LETTERS = {cfg.PLAYER_1: "B", cfg.PLAYER_2: "W"}
+LETTER_PLAYERS = {
+    letter: player for player, letter in PLAYER_LETTERS.items()
+    }
+CHAIN_LETTER = "C"
+KING_LETTER = "K"
+
+
+def encodePosition(p1, p2, kings, player, chainSquare=None):
+    """returns the bytes of a position given as bitboards, the player to
+move and the square of the chain killer or None"""
+
+    code = (
+        p1 | p2 << P2_SHIFT | kings << KINGS_SHIFT
+        | (player - cfg.PLAYER_1) << PLAYER_SHIFT
+        )
+    if chainSquare != None:
+        code |= (chainSquare + 1) << CHAIN_SHIFT
+
+    return code.to_bytes(NUM_BYTES, "little")
+
+def decodePosition(data):
+    """returns the (p1, p2, kings, player, chainSquare) of the bytes of a
+position, the reverse of encodePosition(). Returns None if the bytes aren't
+a valid position"""
+
+    if len(data) != NUM_BYTES:
+        return None
+
+    code = int.from_bytes(data, "little")
+    p1 = code & bitboard.ALL_SQUARES
+    p2 = code >> P2_SHIFT & bitboard.ALL_SQUARES
+    kings = code >> KINGS_SHIFT & bitboard.ALL_SQUARES
+    player = cfg.PLAYER_1 + (code >> PLAYER_SHIFT & 1)
+    chainSquare = (code >> CHAIN_SHIFT) - 1
+
+    if chainSquare == -1:
+        chainSquare = None
+    elif chainSquare >= NUM_SQUARES:
+        return None
+
+    if not isValid(p1, p2, kings, player, chainSquare):
+        return None
+    return p1, p2, kings, player, chainSquare
+
+def isValid(p1, p2, kings, player, chainSquare):
+    """False if two pieces share a square, a king has no piece or the chain
+killer isn't a piece of the player to move"""
+
+    if p1 & p2 or kings & ~(p1 | p2):
+        return False
+
+    if chainSquare != None:
+        ownPieces = p1 if player == cfg.PLAYER_1 else p2
+        if not ownPieces >> chainSquare & 1:
+            return False
+
+    return True
+
+
+def stateToPosition(state):
+    """returns the (p1, p2, kings, player, chainSquare) of a GameState or
+None if its board doesn't work with bitboards"""
+
+    bitboards = bitboard.fromBoard(state.board)
+    if bitboards == None:
+        return None
+
+    chainSquare = None
+    if state.inKillChain:
+        chainSquare = bitboard.coordsToSquare(*state.chainKiller)
+
+    return bitboards + (state.activePlayer, chainSquare)
+
+def positionToState(p1, p2, kings, player, chainSquare):
+    """makes a GameState from a position. Returns None if the chain killer
+can't kill"""
+
+    state = gameState.GameState(bitboard.toBoard(p1, p2, kings), player)
+
+    if chainSquare != None:
+        chainKiller = bitboard.squareCoords[chainSquare]
+        if chainKiller not in state.killers[player]:
+            return None
+
+        state.inKillChain = True
+        state.chainKiller = chainKiller
+
+    return state
+
+
+def encode(state):
+    """returns the bytes of the position of a GameState, or None if its
+board doesn't work with bitboards. Whether a player resigned isn't kept"""
+
+    position = stateToPosition(state)
+    if position == None:
+        return None
+    return encodePosition(*position)
+
+def decode(data):
+    """makes a GameState from the bytes of a position, or returns None if
+they aren't a valid position"""
+
+    position = decodePosition(data)
+    if position == None:
+        return None
+    return positionToState(*position)
+
+
+def squareToNumber(square):
+    """the PDN number of a bitboard square. Bitboard squares go along each
+row from the lowest column, PDN numbers from the highest"""
+
+    row, index = divmod(square, SQUARES_PER_ROW)
+    return row * SQUARES_PER_ROW + (SQUARES_PER_ROW - 1 - index) + 1
+
+def numberToSquare(number):
+    """the bitboard square of a PDN number, the reverse of
+squareToNumber()"""
+
+    row, index = divmod(number - 1, SQUARES_PER_ROW)
+    return row * SQUARES_PER_ROW + (SQUARES_PER_ROW - 1 - index)
+
+
+def squareList(pieces, kings):
+    """the squares of the pieces in the text form, lowest number first"""
+
+    numbers = sorted(
+        (squareToNumber(square), square)
+        for square in bitboard.squaresIn(pieces)
+        )
+    return ",".join(
+        (KING_LETTER if kings >> square & 1 else "") + str(number)
+        for number, square in numbers
+        )
+
+def positionToText(p1, p2, kings, player, chainSquare=None):
+    text = "%s:%s%s:%s%s" %(
+        PLAYER_LETTERS[player],
+        PLAYER_LETTERS[cfg.PLAYER_2], squareList(p2, kings),
+        PLAYER_LETTERS[cfg.PLAYER_1], squareList(p1, kings)
+        )
+    if chainSquare != None:
+        text += ":%s%d" %(CHAIN_LETTER, squareToNumber(chainSquare))
+    return text
+
+def textToPosition(text):
+    """returns the (p1, p2, kings, player, chainSquare) of the text form of
+a position, or None if it isn't one. Ranges of squares such as 1-12 are
+read as well, since some PDN files have them"""
+
+    #a FEN can be quoted, as it is in the FEN tag of a PDN file
+    fields = text.strip().strip('"').upper().split(":")
+    if fields[0] not in LETTER_PLAYERS:
+        return None
+
+    player = LETTER_PLAYERS[fields[0]]
+    pieces = {cfg.PLAYER_1: 0, cfg.PLAYER_2: 0}
+    kings = 0
+    chainSquare = None
+
+    for field in fields[1:]:
+        letter, squares = field[:1], field[1:]
+
+        if letter == CHAIN_LETTER:
+            if not squares.isdigit():
+                return None
+            if not 1 <= int(squares) <= NUM_SQUARES:
+                return None
+            chainSquare = numberToSquare(int(squares))
+            continue
+
+        if letter not in LETTER_PLAYERS:
+            return None
+
+        for item in squares.split(","):
+            item = item.strip()
+            if item == "":
+                continue
+
+            isKing = item.startswith(KING_LETTER)
+            if isKing:
+                item = item[1:]
+
+            first, _, last = item.partition("-")
+            if last == "":
+                last = first
+            if not first.isdigit() or not last.isdigit():
+                return None
+
+            for number in range(int(first), int(last) + 1):
+                if not 1 <= number <= NUM_SQUARES:
+                    return None
+                square = numberToSquare(number)
+                pieces[LETTER_PLAYERS[letter]] |= 1 << square
+                if isKing:
+                    kings |= 1 << square
+
+    p1, p2 = pieces[cfg.PLAYER_1], pieces[cfg.PLAYER_2]
+    if not isValid(p1, p2, kings, player, chainSquare):
+        return None
+    return p1, p2, kings, player, chainSquare
+
+
+def toText(state):
+    """returns the text form of the position of a GameState, or None if its
+board doesn't work with bitboards"""
+
+    position = stateToPosition(state)
+    if position == None:
+        return None
+    return positionToText(*position)
+
+def fromText(text):
+    """makes a GameState from the text form of a position, or returns None
+if it isn't a valid position"""
+
+    position = textToPosition(text)
+    if position == None:
+        return None
+    return positionToState(*position)
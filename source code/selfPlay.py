@@ -0,0 +1,231 @@
+"""This file plays games between computer players without the gui and
+reports how each player did. The games are spread over a pool of processes
+so that many games can be played at once.
+
+Each game is played on its own GameState with cfg.rng seeded from the seed
+of the run and the number of the game, so a run with the same seed and
+players plays the same games again no matter how many processes are used.
+Timed searches (--think-time) depend on the speed of the machine and can't
+be played again exactly.
+
+There is no draw rule in the game, so a game that goes on for more than
+--max-moves moves is counted as a draw.
+
+With --pdn the games are added to a PDN file as each one is finished, see
+gameRecord.py.
+
+Example:
+    python selfPlay.py --games 20 --player1 smart:6 --player2 dumb --seed 1"""
+
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+
+import cfg
+import checkerLogic
+import gameRecord
+import gameState
+
+
+#the names of the player types on the command line
+PLAYER_TYPES = {
+    "dumb": cfg.PLAYER_CPU_DUMB,
+    "smart": cfg.PLAYER_CPU_SMART
+    }
+
+DEFAULT_GAMES = 10
+DEFAULT_MAX_MOVES = 200
+
+
+def parsePlayer(text):
+    """turns a player from the command line, "dumb", "smart" or
+"smart:DEPTH", into the tuple (playerType, search depth)"""
+
+    name, _, depth = text.partition(":")
+
+    if name not in PLAYER_TYPES:
+        raise argparse.ArgumentTypeError(
+            "unknown player type %s, expected one of %s"
+            %(name, ", ".join(PLAYER_TYPES))
+            )
+
+    if depth == "":
+        return PLAYER_TYPES[name], cfg.DEFAULT_SEARCH_DEPTH
+
+    if not depth.isdigit() or int(depth) < cfg.MIN_SEARCH_DEPTH:
+        raise argparse.ArgumentTypeError("invalid search depth %s" %depth)
+
+    return PLAYER_TYPES[name], int(depth)
+
+
+def playGame(player1, player2, seed, maxMoves, thinkTime=None):
+    """plays one game between two players, each a tuple of
+(playerType, search depth). Returns the tuple (winner, number of moves,
+seconds taken, list of moves), the winner is None if the game was a draw"""
+
+    cfg.soundEnabled = False
+    cfg.rng.seed(seed)
+
+    #the transposition table is kept between games in the same process,
+    #it has to be emptied for the game to only depend on the seed
+    if cfg.transpositionTable != None:
+        cfg.transpositionTable.clear()
+
+    players = {cfg.PLAYER_1: player1, cfg.PLAYER_2: player2}
+    state = gameState.GameState()
+    moves = []
+
+    startTime = time.perf_counter()
+
+    while not state.isTerminal() and len(moves) < maxMoves:
+        playerType, depth = players[state.activePlayer]
+
+        move = checkerLogic.chooseComputerMove(
+            state, playerType, depth, thinkTime
+            )
+        state.apply(move)
+        moves.append(move)
+
+    return state.winner, len(moves), time.perf_counter() - startTime, moves
+
+
+def playGames(player1, player2, numGames, seed, maxMoves, thinkTime=None,
+              workers=None, record=None):
+    """plays numGames games over a pool of workers processes and returns
+the list of results from playGame() in the order the games were numbered.
+If record is a gameRecord.RecordWriter each game is written to it as soon
+as it and the games before it are finished"""
+
+    seeds = [seed + game for game in range(numGames)]
+    results = []
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for result in pool.map(
+            playGame,
+            [player1] * numGames, [player2] * numGames, seeds,
+            [maxMoves] * numGames, [thinkTime] * numGames
+            ):
+            results.append(result)
+            if record != None:
+                recordGame(record, player1, player2, result)
+
+    return results
+
+def recordGame(record, player1, player2, result):
+    winner, numMoves, seconds, moves = result
+
+    state = gameState.GameState()
+    record.startGame(
+        state, describePlayer(player1), describePlayer(player2),
+        event="selfPlay"
+        )
+
+    for move in moves:
+        record.recordMove(state.activePlayer, move)
+        state.apply(move)
+
+    record.endGame(gameRecord.RESULTS[winner])
+
+
+def describePlayer(player):
+    playerType, depth = player
+    for name, nameType in PLAYER_TYPES.items():
+        if nameType == playerType:
+            if playerType == cfg.PLAYER_CPU_SMART:
+                return "%s:%d" %(name, depth)
+            return name
+
+def printReport(player1, player2, results, seconds):
+    wins = {cfg.PLAYER_1: 0, cfg.PLAYER_2: 0}
+    draws = 0
+    totalMoves = 0
+
+    for winner, moves, gameSeconds, gameMoves in results:
+        if winner == None:
+            draws += 1
+        else:
+            wins[winner] += 1
+        totalMoves += moves
+
+    print("player one (%s) wins: %d" %(describePlayer(player1),
+                                       wins[cfg.PLAYER_1]))
+    print("player two (%s) wins: %d" %(describePlayer(player2),
+                                       wins[cfg.PLAYER_2]))
+    print("draws: %d" %draws)
+    print("average game length: %.1f moves" %(totalMoves / len(results)))
+    print("moves per second: %.1f (%d moves in %.2f seconds)"
+          %(totalMoves / seconds, totalMoves, seconds))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="plays games between computer players without the gui"
+        )
+    parser.add_argument(
+        "--games", type=int, default=DEFAULT_GAMES,
+        help="how many games to play (default %d)" %DEFAULT_GAMES
+        )
+    parser.add_argument(
+        "--player1", type=parsePlayer, default="smart",
+        help="dumb, smart or smart:DEPTH (default smart)"
+        )
+    parser.add_argument(
+        "--player2", type=parsePlayer, default="dumb",
+        help="dumb, smart or smart:DEPTH (default dumb)"
+        )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="the seed of the first game, the others use the next seeds."
+        " A random seed is picked and printed if it is not given"
+        )
+    parser.add_argument(
+        "--max-moves", type=int, default=DEFAULT_MAX_MOVES,
+        help="games longer than this are draws (default %d)"
+        %DEFAULT_MAX_MOVES
+        )
+    parser.add_argument(
+        "--think-time", type=float, default=None,
+        help="seconds that a smart player searches for each move, going no"
+        " deeper than its depth. Without it the depth is fixed"
+        )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="how many processes play games (default the number of cpus)"
+        )
+    parser.add_argument(
+        "--pdn", default=None,
+        help="a PDN file to add the games to"
+        )
+    args = parser.parse_args(args)
+
+    if args.games < 1:
+        parser.error("--games has to be at least 1")
+
+    seed = args.seed
+    if seed == None:
+        seed = random.randrange(2**32)
+    print("seed: %d" %seed)
+
+    record = None
+    if args.pdn != None:
+        record = gameRecord.openRecord(args.pdn)
+        if record == None:
+            parser.error("can't record the games in %s" %args.pdn)
+
+    startTime = time.perf_counter()
+    results = playGames(
+        args.player1, args.player2, args.games, seed, args.max_moves,
+        args.think_time, args.workers, record
+        )
+
+    if record != None:
+        record.close()
+    printReport(
+        args.player1, args.player2, results, time.perf_counter() - startTime
+        )
+
+
+if __name__ == "__main__":
+    main()
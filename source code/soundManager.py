@@ -0,0 +1,91 @@
+"""This file plays the sound effects of the game.
+
+Nothing is loaded until a sound is played for the first time, so importing
+the game for tools that have no gui does not open an audio device. If
+pygame is not installed or there is no audio device to play sounds on,
+playing a sound does nothing. Sounds can be turned off completely with
+cfg.soundEnabled."""
+
+import os
+import threading
+
+import cfg
+
+
+#the names of the sounds, which are also the names of their files
+PRESS_BUTTON_SOUND = "pressButtonSound"
+DEPRESS_BUTTON_SOUND = "depressButtonSound"
+ERROR_SOUND = "errorSound"
+KILL_SOUND = "killSound"
+MOVE_SOUND = "moveSound"
+#not currently used
+MENU_BUTTON_SOUND = "menuButtonSound"
+
+#the sounds are kept next to this file so that they are found wherever
+#the program is run from
+SOUND_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sounds"
+    )
+
+#the pygame mixer once it has been set up, None if it couldn't be
+mixer = None
+mixerIsSetUp = False
+
+#every sound that has been asked for so far. A sound that couldn't be
+#loaded is kept as None so that loading it isn't tried again
+sounds = {}
+
+#sounds are played from both the gui and the computer player thread
+loadLock = threading.Lock()
+
+
+def setUpMixer():
+    """imports pygame and opens the audio device the first time it is
+called. Returns the mixer or None if there is no way to play sounds"""
+
+    global mixer, mixerIsSetUp
+
+    if not mixerIsSetUp:
+        mixerIsSetUp = True
+
+        try:
+            from pygame import mixer as pygameMixer
+            pygameMixer.init(cfg.SOUND_FREQUENCY)
+            mixer = pygameMixer
+        except Exception:
+            #pygame isn't installed or there is no audio device
+            mixer = None
+
+    return mixer
+
+def getSound(name):
+    """returns the loaded sound with the given name, loading it if this is
+the first time it is asked for. Returns None if it can't be played"""
+
+    with loadLock:
+        if name not in sounds:
+            sound = None
+
+            if setUpMixer() != None:
+                try:
+                    sound = mixer.Sound(
+                        os.path.join(SOUND_DIRECTORY, name + ".wav")
+                        )
+                except Exception:
+                    #the file is missing or can't be read
+                    sound = None
+
+            sounds[name] = sound
+
+        return sounds[name]
+
+def play(name):
+    """plays the sound with the given name, unless sounds are turned off or
+can't be played"""
+
+    if not cfg.soundEnabled:
+        return
+
+    sound = getSound(name)
+    if sound != None:
+        sound.play()
@@ -0,0 +1,244 @@
+"""This file has the transposition table used by the search.
+
+The same position is often reached through different orders of the same
+moves. The table remembers what the search found out about a position,
+keyed by its zobrist key, so that the next time the position comes up the
+search can use the result instead of searching it again.
+
+The table has a fixed number of buckets that is worked out from the size in
+megabytes it is allowed to use. Every bucket holds two entries: the first
+one keeps the result of the deepest search of any position that falls in the
+bucket, the second one is always replaced by the newest result.
+
+SharedTranspositionTable keeps the same buckets in shared memory, so that
+the processes of a parallel search (see parallelSearch.py) all use one
+table and learn from each other's searches. It has no locks: every entry is
+two 64 bit words, the result packed into one and the key xor the result in
+the other. An entry that is read while another process is writing it has
+words from two different results, so the key that comes out of it is wrong
+and it is treated as empty."""
+
+import atexit
+from array import array
+from multiprocessing import shared_memory
+
+
+#what the score of an entry means
+EXACT = 0
+#the real score is at least the stored score
+LOWER_BOUND = 1
+#the real score is at most the stored score
+UPPER_BOUND = 2
+
+#a depth that no search uses, marks an empty entry
+EMPTY = -128
+
+#the bytes used by one entry: the key, the depth, the bound type,
+#the score and the best move
+ENTRY_BYTES = 8 + 1 + 1 + 4 + 2
+ENTRIES_PER_BUCKET = 2
+
+#the best move is stored as its place in the list from possibleMoves()
+NO_MOVE = 0xFFFF
+
+#how a result is packed into one word of a SharedTranspositionTable: the
+#move in the lowest 16 bits, then the score, the bound type and the depth.
+#The top bit is set in every entry so that an empty entry is all zeros
+SHARED_ENTRY_BYTES = 2 * 8
+SCORE_SHIFT = 16
+SCORE_OFFSET = 1 << 31
+BOUND_SHIFT = 48
+DEPTH_SHIFT = 50
+DEPTH_OFFSET = 128
+USED_BIT = 1 << 63
+
+
+class TranspositionTable():
+    """a fixed size table of search results. sizeMB is how many megabytes
+the table may use"""
+
+    def __init__(self, sizeMB):
+        self.numBuckets = max(
+            1, int(sizeMB * 1024 * 1024) // (ENTRY_BYTES * ENTRIES_PER_BUCKET)
+            )
+        self.clear()
+
+    def clear(self):
+        """forgets every stored result"""
+
+        size = self.numBuckets * ENTRIES_PER_BUCKET
+
+        self.keys = array("Q", [0]) * size
+        self.depths = array("b", [EMPTY]) * size
+        self.bounds = array("b", [EXACT]) * size
+        self.scores = array("i", [0]) * size
+        self.moves = array("H", [NO_MOVE]) * size
+
+    def probe(self, key):
+        """returns (depth, score, bound, move number) for the position with
+the given key, or None if nothing is stored for it"""
+
+        slot = (key % self.numBuckets) * ENTRIES_PER_BUCKET
+
+        for slot in (slot, slot + 1):
+            if self.keys[slot] == key and self.depths[slot] != EMPTY:
+                return (
+                    self.depths[slot], self.scores[slot],
+                    self.bounds[slot], self.moves[slot]
+                    )
+
+        return None
+
+    def store(self, key, depth, score, bound, move=NO_MOVE):
+        """stores a search result. A result that is at least as deep as the
+one in the depth preferred entry, or is for the same position, goes there
+and the result it replaces moves to the always replace entry. Other results
+go to the always replace entry"""
+
+        slot = (key % self.numBuckets) * ENTRIES_PER_BUCKET
+
+        if self.keys[slot] == key or depth >= self.depths[slot]:
+            if self.keys[slot] != key and self.depths[slot] != EMPTY:
+                self.copyEntry(slot, slot + 1)
+        else:
+            slot += 1
+
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.scores[slot] = score
+        self.bounds[slot] = bound
+        self.moves[slot] = move
+
+    def copyEntry(self, fromSlot, toSlot):
+        self.keys[toSlot] = self.keys[fromSlot]
+        self.depths[toSlot] = self.depths[fromSlot]
+        self.scores[toSlot] = self.scores[fromSlot]
+        self.bounds[toSlot] = self.bounds[fromSlot]
+        self.moves[toSlot] = self.moves[fromSlot]
+
+    def close(self):
+        """the table is freed along with the object, there is nothing to
+close. This is here so that it can be used like a
+SharedTranspositionTable"""
+        pass
+
+    def abandon(self):
+        """like close(), there is nothing to do"""
+        pass
+
+
+def packEntry(depth, score, bound, move):
+    return (
+        USED_BIT
+        | (depth + DEPTH_OFFSET) << DEPTH_SHIFT
+        | bound << BOUND_SHIFT
+        | (score + SCORE_OFFSET) << SCORE_SHIFT
+        | move
+        )
+
+def unpackEntry(data):
+    """returns (depth, score, bound, move number) from a packed entry"""
+    return (
+        (data >> DEPTH_SHIFT & 0xFF) - DEPTH_OFFSET,
+        (data >> SCORE_SHIFT & 0xFFFFFFFF) - SCORE_OFFSET,
+        data >> BOUND_SHIFT & 0x3,
+        data & 0xFFFF
+        )
+
+
+class SharedTranspositionTable():
+    """a TranspositionTable kept in shared memory. The process that makes
+the table gives its size in megabytes, the other processes attach to it
+with the name and numBuckets of the table that was made"""
+
+    def __init__(self, sizeMB=None, name=None, numBuckets=None):
+        if name == None:
+            self.numBuckets = max(
+                1,
+                int(sizeMB * 1024 * 1024)
+                // (SHARED_ENTRY_BYTES * ENTRIES_PER_BUCKET)
+                )
+            self.memory = shared_memory.SharedMemory(
+                create=True,
+                size=self.numBuckets * ENTRIES_PER_BUCKET * SHARED_ENTRY_BYTES
+                )
+            self.isOwner = True
+        else:
+            self.numBuckets = numBuckets
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.isOwner = False
+
+        self.name = self.memory.name
+
+        #slot i of the table is words[2*i], the key xor the packed result,
+        #and words[2*i + 1], the packed result
+        self.words = self.memory.buf.cast("Q")
+
+        if self.isOwner:
+            self.clear()
+
+        #the shared memory can only be let go of cleanly before python
+        #shuts down, so it is closed then if it hasn't been already
+        atexit.register(self.close)
+
+    def clear(self):
+        """forgets every stored result, for every process using the table"""
+
+        size = self.numBuckets * ENTRIES_PER_BUCKET * SHARED_ENTRY_BYTES
+        self.memory.buf[:size] = bytes(size)
+
+    def abandon(self):
+        """stops the table from being closed when python shuts down, for
+when a thread that can't be stopped may still be using it. The shared
+memory is then left for the operating system to free"""
+
+        atexit.unregister(self.close)
+
+    def close(self):
+        """stops using the table. The process that made it frees the shared
+memory, so it has to close it last"""
+
+        atexit.unregister(self.close)
+
+        self.words.release()
+        self.memory.close()
+        if self.isOwner:
+            self.memory.unlink()
+
+    def probe(self, key):
+        """returns (depth, score, bound, move number) for the position with
+the given key, or None if nothing is stored for it"""
+
+        slot = (key % self.numBuckets) * ENTRIES_PER_BUCKET
+
+        for slot in (slot, slot + 1):
+            data = self.words[2*slot + 1]
+            if data != 0 and self.words[2*slot] ^ data == key:
+                return unpackEntry(data)
+
+        return None
+
+    def store(self, key, depth, score, bound, move=NO_MOVE):
+        """stores a search result with the same replacement scheme as
+TranspositionTable.store()"""
+
+        slot = (key % self.numBuckets) * ENTRIES_PER_BUCKET
+
+        data = self.words[2*slot + 1]
+        if data == 0:
+            slotKey = None
+            slotDepth = EMPTY
+        else:
+            slotKey = self.words[2*slot] ^ data
+            slotDepth = unpackEntry(data)[0]
+
+        if slotKey == key or depth >= slotDepth:
+            if slotKey != key and data != 0:
+                self.words[2*slot + 2] = slotKey ^ data
+                self.words[2*slot + 3] = data
+        else:
+            slot += 1
+
+        data = packEntry(depth, score, bound, move)
+        self.words[2*slot] = key ^ data
+        self.words[2*slot + 1] = data
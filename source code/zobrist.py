@@ -0,0 +1,57 @@
+"""This file has the zobrist keys used to give every checker position a
+number that is almost certainly different from the number of any other
+position.
+
+Every kind of piece on every tile has a random 64 bit key and the key of a
+board is all the keys of its pieces xored together. Moving a piece only
+changes the keys of the tiles it touches, so the key of a board can be kept
+up to date as moves are made instead of being worked out again.
+
+The random numbers come from a fixed seed, so a position has the same key in
+every run of the program and in every process."""
+
+import random
+
+import cfg
+
+
+ZOBRIST_SEED = 20200203
+KEY_BITS = 64
+
+keyGenerator = random.Random(ZOBRIST_SEED)
+
+#pieceKeys[(player, pieceType)][row][col]
+pieceKeys = {}
+for player in (cfg.PLAYER_1, cfg.PLAYER_2):
+    for pieceType in (cfg.CHECKER_MAN, cfg.CHECKER_KING):
+        pieceKeys[(player, pieceType)] = [
+            [keyGenerator.getrandbits(KEY_BITS) for col in range(cfg.NUM_COLS)]
+            for row in range(cfg.NUM_ROWS)
+            ]
+
+#xored into the key when it is player two's turn to move
+PLAYER_2_TO_MOVE_KEY = keyGenerator.getrandbits(KEY_BITS)
+
+
+def tileKey(row, col, player, pieceType):
+    """the key of one tile. An empty tile has a key of 0"""
+    if player == cfg.UNOCCUPIED:
+        return 0
+    return pieceKeys[(player, pieceType)][row][col]
+
+def boardKey(board):
+    """works out the key of a 2d list of Tiles or ModelTiles from scratch"""
+
+    key = 0
+    for row in range(len(board)):
+        for col, tile in enumerate(board[row]):
+            if tile.player != cfg.UNOCCUPIED:
+                key ^= pieceKeys[(tile.player, tile.pieceType)][row][col]
+
+    return key
+
+def positionKey(boardKey, player):
+    """the key of a board with the given player to move"""
+    if player == cfg.PLAYER_2:
+        return boardKey ^ PLAYER_2_TO_MOVE_KEY
+    return boardKey